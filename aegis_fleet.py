@@ -0,0 +1,237 @@
+# aegis_fleet.py
+import argparse
+import asyncio
+import functools
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.context_compactor import ContextCompactor
+from agents.multi_speciality import MultiSpecialityCoordinator
+from agents.severity_estimator import SeverityEstimator
+from agents.paramedic_guidance_agent import ParamedicGuidanceAgent
+
+from core.ingestion import mock_vitals
+from core.sessions import InMemorySessionService
+from core.a2a import A2AMessage, A2ARouter
+from core.observability import Metrics
+from core.vitals_buffer import VitalsBuffer
+
+from oracle.cached_oracle import CachedOracle
+from oracle.gemini_oracle_stub import GeminiOracle
+from tools.openapi_client import HospitalOpenAPIClient
+
+
+class SessionStats:
+    """
+    Per-session throughput and latency counters.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.ops = {}
+
+    def record(self, op, elapsed):
+        count, total, worst = self.ops.get(op, (0, 0.0, 0.0))
+        self.ops[op] = (count + 1, total + elapsed, max(worst, elapsed))
+
+    def export(self):
+        uptime = time.perf_counter() - self.started
+        out = {"uptime_s": uptime}
+        for op, (count, total, worst) in self.ops.items():
+            out[op] = {
+                "count": count,
+                "per_second": count / uptime if uptime > 0 else 0.0,
+                "mean_ms": total / count * 1000,
+                "max_ms": worst * 1000
+            }
+        return out
+
+
+class PatientSession:
+    """
+    Isolated per-patient state: vitals buffer, trend state, session log
+    and analysis.
+    """
+
+    def __init__(self, session_id, vitals_capacity=3600):
+        self.session_id = session_id
+        self.vitals_history = VitalsBuffer(capacity=vitals_capacity)
+        self.compactor = ContextCompactor()
+        self.session = InMemorySessionService()
+        self.last_severity = None
+        self.last_trend = None
+        self.last_analysis = None
+        self.last_response = None
+        self.stats = SessionStats()
+        self.lock = asyncio.Lock()
+
+
+class FleetSessionManager:
+    """
+    Runs many patient sessions concurrently on one asyncio event loop.
+
+    Agents are shared and only read; every piece of per-patient state lives
+    on its PatientSession. Blocking work (oracle and hospital calls) goes
+    to a thread pool, outside the session lock, so one slow call never
+    stalls ingest or analysis of the other sessions.
+    """
+
+    def __init__(self, hospital_client=None, max_workers=16):
+        # Fleet-wide histograms; SessionStats keeps the per-session view
+        self.metrics = Metrics()
+
+        # Shared, read-only agents (the trend compactor is per session)
+        self.specialty = MultiSpecialityCoordinator()
+        self.severity = SeverityEstimator()
+        # One cache for the fleet. analyze() calls it from executor threads,
+        # so identical cases in different sessions share one in-flight call
+        self.oracle = CachedOracle(GeminiOracle(), metrics=self.metrics, max_workers=max_workers)
+        self.guidance = ParamedicGuidanceAgent()
+
+        # A2A
+        self.router = A2ARouter()
+        self.hospital_client = hospital_client or HospitalOpenAPIClient("http://127.0.0.1:5001", metrics=self.metrics)
+        self.router.register("HospitalAI", self.hospital_client)
+
+        self.sessions = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fleet")
+
+    def open_session(self, session_id=None):
+        session_id = session_id or uuid.uuid4().hex[:8]
+        if session_id in self.sessions:
+            raise ValueError(f"session {session_id} already open")
+        session = PatientSession(session_id)
+        self.sessions[session_id] = session
+        return session
+
+    def close_session(self, session_id):
+        return self.sessions.pop(session_id, None)
+
+    async def ingest(self, session_id, vitals):
+        """Record one vitals reading and refresh severity and trend."""
+        session = self.sessions[session_id]
+        start = time.perf_counter()
+
+        async with session.lock:
+            session.vitals_history.append(vitals)
+            session.session.add_event("vitals", vitals)
+            session.last_severity = self.severity.estimate(vitals)
+            session.last_trend = session.compactor.summarize(session.vitals_history)
+
+        elapsed = time.perf_counter() - start
+        session.stats.record("ingest", elapsed)
+        self.metrics.observe("fleet.ingest", elapsed)
+        return session.last_severity, session.last_trend
+
+    async def analyze(self, session_id, report):
+        """Headless analysis + hospital handoff for one session."""
+        session = self.sessions[session_id]
+        start = time.perf_counter()
+
+        async with session.lock:
+            session.session.add_event("paramedic_report", report)
+            current_vitals = {k: v for k, v in session.vitals_history[-1].items() if k != "ts"}
+            severity = self.severity.estimate(current_vitals)
+            trend = session.compactor.summarize(session.vitals_history)
+            matches = self.guidance.index.scan(report)
+            specialists = self.specialty.assign_specialists(report, current_vitals, matches)
+            protocol_name = self.guidance.select_protocol(report, matches)
+
+        loop = asyncio.get_running_loop()
+        oracle_out = await loop.run_in_executor(self._executor, functools.partial(
+            self.oracle.analyze,
+            report=report,
+            vitals=current_vitals,
+            severity_score=severity,
+            trend=trend,
+            specialists=specialists
+        ))
+        oracle_out["protocol"] = protocol_name
+        session.last_analysis = oracle_out
+
+        msg = A2AMessage(
+            from_agent="AEGIS",
+            to_agent="HospitalAI",
+            payload={
+                **oracle_out,
+                "injury_description": report,
+                "session_id": session_id
+            },
+            trace_id=str(uuid.uuid4())
+        )
+
+        response = await loop.run_in_executor(
+            self._executor, self.router.send, msg, self.hospital_client
+        )
+
+        session.last_response = response
+        session.session.add_event("hospital_response", response)
+        elapsed = time.perf_counter() - start
+        session.stats.record("analyze", elapsed)
+        self.metrics.observe("fleet.analyze", elapsed)
+        return oracle_out, response
+
+    async def run_session(self, session_id, report, ticks=10, interval=1.0, vitals_source=mock_vitals):
+        """Stream `ticks` readings at `interval` seconds, then analyze."""
+        for _ in range(ticks):
+            await self.ingest(session_id, vitals_source())
+            await asyncio.sleep(interval)
+        return await self.analyze(session_id, report)
+
+    async def run_fleet(self, reports, ticks=10, interval=1.0):
+        """Open one session per report and run them all concurrently."""
+        sessions = [self.open_session() for _ in reports]
+        results = await asyncio.gather(*(
+            self.run_session(s.session_id, report, ticks=ticks, interval=interval)
+            for s, report in zip(sessions, reports)
+        ))
+        return dict(zip((s.session_id for s in sessions), results))
+
+    def stats(self):
+        return {sid: s.stats.export() for sid, s in self.sessions.items()}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+        self.oracle.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run many AEGIS patient sessions at once.")
+    parser.add_argument("--patients", type=int, default=24)
+    parser.add_argument("--ticks", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    scenarios = [
+        "Male, 35 years old, fell 20 feet from scaffolding. Visible chest deformity.",
+        "Female, 52, head injury after car crash, decreased consciousness.",
+        "Industrial fire, burns to both arms and torso.",
+        "Motorcycle collision, open leg fracture, heavy bleeding."
+    ]
+
+    manager = FleetSessionManager()
+    start = time.perf_counter()
+    asyncio.run(manager.run_fleet(
+        [scenarios[i % len(scenarios)] for i in range(args.patients)],
+        ticks=args.ticks,
+        interval=args.interval
+    ))
+    elapsed = time.perf_counter() - start
+    manager.shutdown()
+
+    print("\n" + "="*60)
+    print(f"🚑 FLEET RUN: {args.patients} sessions in {elapsed:.2f}s")
+    print("="*60)
+    for sid, stats in manager.stats().items():
+        ingest = stats.get("ingest", {})
+        analyze = stats.get("analyze", {})
+        print(f"[{sid}] ingest {ingest.get('count', 0)} @ {ingest.get('mean_ms', 0):.3f} ms mean | "
+              f"analyze {analyze.get('mean_ms', 0):.1f} ms")
+    fleet = manager.metrics.histogram("fleet.analyze")
+    if fleet["count"]:
+        print(f"📈 Analyze p50 {fleet['p50'] * 1000:.1f} ms | p99 {fleet['p99'] * 1000:.1f} ms over {fleet['count']} sessions")
+    oracle = manager.oracle.stats()
+    print(f"🧠 Oracle cache: {oracle['hit_rate']:.0%} hit rate, "
+          f"{oracle.get('oracle.cache.shared', 0)} shared in-flight calls, {oracle['entries']} entries")
+    print("="*60 + "\n")
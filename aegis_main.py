@@ -1,58 +1,345 @@
 # aegis_main.py
-import time, uuid, json, os
+import time
+_IMPORT_STARTED = time.perf_counter()
 
-from agents.asr_agent import ASRAgent
-from agents.tts_agent import TTSAgent
+import threading, uuid, json, os
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+# ASR, TTS and the HTTP client are imported when first built (see AEGIS)
+from agents.tts_agent import CRITICAL
 from agents.context_compactor import ContextCompactor
 from agents.multi_speciality import MultiSpecialityCoordinator
 from agents.severity_estimator import SeverityEstimator
 from agents.paramedic_guidance_agent import ParamedicGuidanceAgent
 
 from core.sessions import InMemorySessionService, MemoryBank
-from core.observability import Metrics
-from core.a2a import A2AMessage, A2ARouter
+from core.observability import Metrics, MetricsExporter
+from core.a2a import A2ALogWriter, A2AMessage, A2ARouter
+from core.ingestion import SimulatedVitalsSource, VitalsIngestor, mock_vitals
+from core.vitals_buffer import VitalsBuffer
 
+from oracle.cached_oracle import CachedOracle
 from oracle.gemini_oracle_stub import GeminiOracle
-from tools.openapi_client import HospitalOpenAPIClient
 
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+HOSPITAL_URL = "http://127.0.0.1:5001"
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
+# Readings exported to vitals.json for the dashboard's /api/vitals
+VITALS_SNAPSHOT = 300
+
+# How long run() waits for the first vital sign before giving up
+FIRST_VITALS_TIMEOUT = 30.0
+
+# Built on first use (or by prewarm()) instead of in __init__
+LAZY_COMPONENTS = ("asr", "tts", "oracle", "hospital_client", "memory_bank")
+
+# Prompts spoken outside the protocols; FIXED_PHRASES is pre-rendered at startup
+PROMPTS = {
+    "online": "AEGIS system online. All agents initialized.",
+    "ready": "AEGIS ready. Describe the patient's visible injuries.",
+    "step_failed": "Describe what happened.",
+    "protocol_excellent": "Excellent work. All critical interventions completed.",
+    "protocol_good": "Good effort. Most critical steps completed. Continue monitoring closely.",
+    "protocol_critical": "Multiple interventions failed. Request ALS backup and expedite transport.",
+    "eta": "What is your estimated time of arrival?",
+    "hospital_notified": "Hospital notified. {ward} ward confirmed. Specialists are being mobilized."
+}
+ORACLE_WARDS = ("ICU", "HDU")  # what GeminiOracle assigns
+FIXED_PHRASES = [p for p in PROMPTS.values() if "{ward}" not in p] + [
+    PROMPTS["hospital_notified"].format(ward=ward) for ward in ORACLE_WARDS
+]
 
 
 class AEGIS:
-    def __init__(self):
-        # Agents
-        self.asr = ASRAgent()
-        self.tts = TTSAgent(mode="offline")
-        self.compactor = ContextCompactor()
-        self.specialty = MultiSpecialityCoordinator()
-        self.severity = SeverityEstimator()
-        self.oracle = GeminiOracle()
-        self.guidance = ParamedicGuidanceAgent()
-
-        # Memory systems
-        self.session = InMemorySessionService()
-        self.memory_bank = MemoryBank(os.path.join(PROJECT_ROOT, "memory_bank.json"))
-
-        # Observability
-        self.metrics = Metrics()
-
-        # A2A
-        self.router = A2ARouter()
-        self.hospital_client = HospitalOpenAPIClient("http://127.0.0.1:5001")
-        self.router.register("HospitalAI", self.hospital_client)
-
-        # Data buffers
-        self.vitals_history = []
+    """
+    Single-patient AEGIS session.
+
+    By default every agent talks to real devices and services (microphone,
+    speakers, Gemini, hospital_sim on :5001) and state files live in the
+    project root. Each of those can be injected instead, e.g. the scripted
+    stand-ins in tools/headless.py for benchmarks and replays; `data_dir`
+    moves the memory bank, A2A log, last_analysis.json, metrics.json and
+    vitals.json.
+
+    The heavy components (ASR, TTS, oracle, hospital client, memory bank)
+    are built on first use, so vitals can stream right after __init__;
+    `prewarm()` builds them in the background meanwhile. `startup` records
+    when each component was built, on which thread and how long it took.
+    """
+
+    def __init__(self, asr=None, tts=None, oracle=None, hospital_client=None,
+                 data_dir=PROJECT_ROOT, watch_protocols=True):
+        self._started = time.perf_counter()
+        self.startup = {"imports": {"at": -IMPORT_SECONDS, "seconds": IMPORT_SECONDS, "thread": "MainThread"}}
+        self.data_dir = data_dir
+
+        # Observability; snapshots go to metrics.json and vitals.json for the dashboard
+        with self._startup_step("metrics"):
+            self.metrics = Metrics()
+            self.metrics_exporter = MetricsExporter(
+                self.metrics, os.path.join(data_dir, "metrics.json"),
+                snapshots={os.path.join(data_dir, "vitals.json"): self._vitals_snapshot}
+            )
+
+        # Heavy agents: injected, or built lazily by the _build_* methods
+        self._components = {}
+        self._component_locks = {name: threading.Lock() for name in LAZY_COMPONENTS}
+        self._oracle_backend = oracle
+
+        # Light agents
+        with self._startup_step("agents"):
+            self.compactor = ContextCompactor()
+            self.specialty = MultiSpecialityCoordinator()
+            self.severity = SeverityEstimator()
+        with self._startup_step("protocols"):
+            self.guidance = ParamedicGuidanceAgent()
+            if watch_protocols:
+                # Pick up edited or newly shipped protocol files without a restart
+                self.guidance.registry.watch()
+
+        # Memory systems (the memory bank opens lazily)
+        self.session = self._new_session_store()
+
+        # A2A (the process-wide log writer unless the state lives elsewhere)
+        with self._startup_step("a2a"):
+            log_writer = None
+            if os.path.abspath(data_dir) != PROJECT_ROOT:
+                log_writer = A2ALogWriter(os.path.join(data_dir, "a2a_logs.jsonl"))
+            self._own_log_writer = log_writer
+            self.router = A2ARouter(log_writer=log_writer)
+
+        for name, value in (("asr", asr), ("tts", tts), ("hospital_client", hospital_client)):
+            if value is not None:
+                setattr(self, name, value)
+
+        # Background stages of analyze_patient (oracle, hospital updates)
+        self.pipeline = ThreadPoolExecutor(max_workers=4, thread_name_prefix="aegis-pipeline")
+
+        # Data buffers: one hour at 1 Hz, plus 1-minute averages for a day
+        self.vitals_history = VitalsBuffer(capacity=3600, tiers=[(60, 1440)])
         self.last_analysis = None
+        self.last_severity = None
+        self.last_trend = None
+
+        # Vitals ingestion runs alongside ASR, protocol and hospital calls
+        self.vitals_rate_hz = 1.0
+        self.persist_interval = 1.0  # seconds between memory bank vitals entries
+        self.ingestor = None
+        self._vitals_lock = threading.Lock()
+        self._first_vitals = threading.Event()
+        self._echo_vitals = False
+        self._vitals_count = 0
+        self._last_persist = 0.0
+
+        # Pause between protocol steps, giving the medic time to act
+        self.step_pause = 1.0
+        self._warm_threads = []
+        self._mark("init")
+
+    @contextmanager
+    def _startup_step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.startup[name] = {
+                "at": start - self._started,
+                "seconds": elapsed,
+                "thread": threading.current_thread().name
+            }
+            self.metrics.observe(f"startup.{name}", elapsed)
+
+    def _mark(self, name):
+        """Records a startup milestone: seconds since __init__ started."""
+        self.startup[name] = {"at": time.perf_counter() - self._started, "seconds": 0.0,
+                              "thread": threading.current_thread().name}
+
+    def _component(self, name):
+        value = self._components.get(name)
+        if value is None:
+            with self._component_locks[name]:
+                value = self._components.get(name)
+                if value is None:
+                    with self._startup_step(name):
+                        value = getattr(self, f"_build_{name}")()
+                    self._components[name] = value
+        return value
+
+    def _build_asr(self):
+        from agents.asr_agent import ASRAgent
+        from agents.asr_backends import MicrophoneSource, VoskBackend
+
+        vosk_model = os.environ.get("AEGIS_VOSK_MODEL")
+        if vosk_model:
+            # Offline streaming recognition with early stop on command words
+            asr = ASRAgent(backend=VoskBackend(vosk_model), source=MicrophoneSource())
+            print("ℹ️ Streaming ASR reads the microphone only while listening; barge-in is off.")
+        else:
+            # One microphone stream for the whole run, calibrated once;
+            # barge-in detection is gated while our own prompt is playing
+            asr = ASRAgent(persistent=True, playback=self._tts_playing)
+        # Barge-in: stop talking as soon as the medic starts speaking
+        asr.on_speech(self._interrupt_tts)
+        return asr
+
+    def _build_tts(self):
+        from agents.tts_agent import TTSAgent
+
+        return TTSAgent(mode="offline")
+
+    def _build_oracle(self):
+        # Identical cases reuse the oracle decision; a slow call falls back to a stale one
+        return CachedOracle(self._oracle_backend or GeminiOracle(), metrics=self.metrics, timeout=10.0)
+
+    def _build_hospital_client(self):
+        from tools.openapi_client import HospitalOpenAPIClient
+
+        client = HospitalOpenAPIClient(HOSPITAL_URL, metrics=self.metrics)
+        self.router.register("HospitalAI", client)
+        return client
+
+    def _build_memory_bank(self):
+        return MemoryBank(os.path.join(self.data_dir, "memory_bank.json"))
+
+    def _new_session_store(self):
+        # An hour of vitals at 1 Hz in memory; older events spill to the memory bank
+        return InMemorySessionService(
+            capacities={"vitals": 3600},
+            spill=lambda event_type, payload: self.memory_bank.save(event_type, payload)
+        )
+
+    def _interrupt_tts(self):
+        tts = self._components.get("tts")
+        if tts is not None:
+            tts.interrupt()
+
+    def _vitals_snapshot(self):
+        with self._vitals_lock:
+            return self.vitals_history.to_dict(VITALS_SNAPSHOT)
+
+    def _tts_playing(self):
+        tts = self._components.get("tts")
+        return bool(getattr(tts, "playing", False))
+
+    @property
+    def asr(self):
+        return self._component("asr")
+
+    @asr.setter
+    def asr(self, value):
+        value.on_speech(self._interrupt_tts)
+        self._components["asr"] = value
+
+    @property
+    def tts(self):
+        return self._component("tts")
+
+    @tts.setter
+    def tts(self, value):
+        self._components["tts"] = value
+
+    @property
+    def oracle(self):
+        return self._component("oracle")
+
+    @property
+    def hospital_client(self):
+        return self._component("hospital_client")
+
+    @hospital_client.setter
+    def hospital_client(self, value):
+        self.router.register("HospitalAI", value)
+        self._components["hospital_client"] = value
+
+    @property
+    def memory_bank(self):
+        return self._component("memory_bank")
+
+    def prewarm(self):
+        """
+        Builds every lazy component on its own background thread and
+        pre-renders the fixed prompts, so they are ready by the time the
+        medic is first asked something. Returns the threads.
+        """
+        def warm(name):
+            try:
+                component = self._component(name)
+                if name == "tts":
+                    with self._startup_step("tts.warm"):
+                        component.warm(self.guidance.spoken_phrases() + FIXED_PHRASES, background=False)
+            except Exception as e:
+                # Retried on first use, which reports the error where it matters
+                print(f"⚠️ Pre-warm of {name} failed: {e}")
+
+        if not self._warm_threads:
+            for name in LAZY_COMPONENTS:
+                thread = threading.Thread(target=warm, args=(name,), name=f"warm-{name}", daemon=True)
+                thread.start()
+                self._warm_threads.append(thread)
+        return self._warm_threads
+
+    def startup_report(self):
+        """Startup timeline, ordered by when each step started (seconds since __init__)."""
+        return dict(sorted(self.startup.items(), key=lambda item: item[1]["at"]))
+
+    def new_session(self):
+        """Forgets the current patient; agents, caches and connections stay up."""
+        with self._vitals_lock:
+            self.vitals_history = VitalsBuffer(capacity=3600, tiers=[(60, 1440)])
+            self.compactor.reset()
+            self.last_analysis = None
+            self.last_severity = None
+            self.last_trend = None
+            self._vitals_count = 0
+            self._last_persist = 0.0
+        self.session.flush()
+        self.session = self._new_session_store()
+        self._first_vitals.clear()
 
     def ingest_vitals(self):
         """Mock vitals - replace with real IoT."""
-        import random
-        return {
-            "hr": random.randint(130, 160),
-            "bp_systolic": random.randint(70, 95),
-            "spo2": random.randint(84, 92)
-        }
+        return mock_vitals()
+
+    def vitals_sources(self):
+        """Sources for the ingestor; override to use replay or socket sources."""
+        return [SimulatedVitalsSource(rate_hz=self.vitals_rate_hz, generator=self.ingest_vitals)]
+
+    def _on_vitals(self, reading):
+        """Ingestor subscriber: feeds the buffer, trend engine, severity and logs."""
+        with self._vitals_lock:
+            self.vitals_history.append(reading, ts=reading["ts"])
+            self.last_trend = self.compactor.summarize(self.vitals_history)
+            self.last_severity = self.severity.estimate(reading)
+        if "first_vitals" not in self.startup:
+            self._mark("first_vitals")
+
+        self.session.add_event("vitals", reading)
+        self.metrics.count("vitals.readings")
+        # Half a reading period of slack: monitor timestamps jitter around the
+        # nominal gap. At or below one reading per interval, every one is kept.
+        slack = 0.5 / self.vitals_rate_hz
+        if (self.vitals_rate_hz * self.persist_interval <= 1
+                or reading["ts"] - self._last_persist >= self.persist_interval - slack):
+            self._last_persist = reading["ts"]
+            self.memory_bank.save("vitals", reading)
+
+        self._vitals_count += 1
+        if self._echo_vitals:
+            print(f"[{self._vitals_count:02d}] Vitals: HR={reading['hr']} BP={reading['bp_systolic']} SpO2={reading['spo2']}%")
+        self._first_vitals.set()
+
+    def start_vitals(self):
+        self.ingestor = VitalsIngestor(self.vitals_sources())
+        self.ingestor.subscribe(self._on_vitals)
+        self.ingestor.start()
+
+    def stop_vitals(self):
+        if self.ingestor is not None:
+            self.ingestor.stop()
+            self.ingestor = None
 
     def display_visual_status(self, vitals, severity_score, trend):
         """Display visual patient status."""
@@ -88,21 +375,21 @@ class AEGIS:
         protocol = self.guidance.get_protocol(protocol_name)
         
         print("\n" + "="*50)
-        print(f"📋 INITIATING {protocol['name']}")
+        print(f"📋 INITIATING {protocol.name}")
         print("="*50)
         
-        self.tts.speak(f"CRITICAL ALERT. Initiating {protocol['name'].lower()}.")
+        self.tts.speak(f"CRITICAL ALERT. Initiating {protocol.name.lower()}.", priority=CRITICAL)
         
         completed_steps = 0
         failed_steps = 0
         step_logs = []
         
-        for step in protocol["steps"]:
-            print(f"\nSTEP {step['id']}/{len(protocol['steps'])}")
+        for step in protocol.steps:
+            print(f"\nSTEP {step.id}/{len(protocol.steps)}")
             print("-" * 50)
-            print(f"📌 {step['instruction']}")
+            print(f"📌 {step.instruction}")
             
-            self.tts.speak(f"Step {step['id']}. {step['instruction']}")
+            self.tts.speak(f"Step {step.id}. {step.instruction}")
             
             # Get paramedic response
             print("🎤 Awaiting response: Say 'COMPLETED' or 'FAILED'")
@@ -117,33 +404,35 @@ class AEGIS:
             
             if success:
                 print("✅ STEP COMPLETED")
-                feedback = self.guidance.get_step_feedback(protocol_name, step['id'], True)
-                self.tts.speak(feedback)
+                feedback = self.guidance.get_step_feedback(protocol_name, step.id, True)
+                # Queued; the next blocking prompt plays after it
+                self.tts.say(feedback)
                 completed_steps += 1
-                step_logs.append({"step": step['id'], "status": "completed", "instruction": step['instruction']})
+                step_logs.append({"step": step.id, "status": "completed", "instruction": step.instruction})
             else:
                 print("❌ STEP FAILED")
-                feedback = self.guidance.get_step_feedback(protocol_name, step['id'], False)
-                self.tts.speak(feedback)
+                feedback = self.guidance.get_step_feedback(protocol_name, step.id, False)
+                self.tts.say(feedback)
                 
                 # Ask for details
                 print("🎤 Describe what happened:")
-                self.tts.speak("Describe what happened.")
+                self.tts.speak(PROMPTS["step_failed"])
                 details = self.asr.listen(timeout=15, phrase_time_limit=15)
                 print(f"📝 Paramedic describes: {details}")
                 
                 failed_steps += 1
                 step_logs.append({
-                    "step": step['id'], 
+                    "step": step.id, 
                     "status": "failed", 
-                    "instruction": step['instruction'],
+                    "instruction": step.instruction,
                     "details": details
                 })
             
-            time.sleep(1)
+            if self.step_pause:
+                time.sleep(self.step_pause)
         
         # Protocol summary
-        total_steps = len(protocol['steps'])
+        total_steps = len(protocol.steps)
         success_rate = (completed_steps / total_steps) * 100
         
         print("\n" + "="*50)
@@ -155,15 +444,15 @@ class AEGIS:
         status = "🟢 EXCELLENT" if success_rate >= 80 else "🟡 GOOD" if success_rate >= 60 else "🔴 CRITICAL"
         print(f"{status} STATUS: {success_rate:.0f}% success rate")
         
-        feedback_msg = "Excellent work. All critical interventions completed." if success_rate >= 80 else \
-                      "Good effort. Most critical steps completed. Continue monitoring closely." if success_rate >= 60 else \
-                      "Multiple interventions failed. Request ALS backup and expedite transport."
+        feedback_msg = PROMPTS["protocol_excellent"] if success_rate >= 80 else \
+                      PROMPTS["protocol_good"] if success_rate >= 60 else \
+                      PROMPTS["protocol_critical"]
         
-        self.tts.speak(feedback_msg)
+        self.tts.say(feedback_msg)
         print("="*50 + "\n")
         
         return {
-            "protocol": protocol['name'],
+            "protocol": protocol.name,
             "completed": completed_steps,
             "failed": failed_steps,
             "success_rate": success_rate,
@@ -173,7 +462,7 @@ class AEGIS:
     def collect_eta(self):
         """Collect ETA from paramedic."""
         print("\n" + "="*50)
-        self.tts.speak("What is your estimated time of arrival?")
+        self.tts.speak(PROMPTS["eta"])
         print("🎤 Please state ETA in minutes:")
         
         eta_response = self.asr.listen(timeout=10, phrase_time_limit=5)
@@ -189,96 +478,183 @@ class AEGIS:
         
         return eta_minutes
 
+    def _save_last_analysis(self, analysis):
+        """Save for dashboard."""
+        with open(os.path.join(self.data_dir, "last_analysis.json"), "w") as f:
+            json.dump(analysis, f, indent=2)
+
+    def _notify_hospital(self, trace_id, payload, stage):
+        """Send one pipeline stage to the hospital and persist its response."""
+        msg = A2AMessage(
+            from_agent="AEGIS",
+            to_agent="HospitalAI",
+            payload={**payload, "stage": stage},
+            trace_id=trace_id
+        )
+        with self.metrics.timer(f"agent.hospital.{stage}"):
+            response = self.router.send(msg, target_client=self.hospital_client)
+        self.memory_bank.save("hospital_response", response)
+        return response
+
+    def _pre_alert(self, trace_id, report, current_vitals, severity, trend, specialists):
+        """Oracle decision + first hospital notification, off the protocol path."""
+        with self.metrics.timer("agent.oracle"):
+            oracle_out = self.oracle.analyze(
+                report=report,
+                vitals=current_vitals,
+                severity_score=severity,
+                trend=trend,
+                specialists=specialists
+            )
+        self._save_last_analysis(oracle_out)
+
+        response = self._notify_hospital(
+            trace_id, {**oracle_out, "injury_description": report}, "pre_alert"
+        )
+        return oracle_out, response
+
+    def _send_update(self, trace_id, pre_alert, report, analysis):
+        """Stream the updated analysis to the hospital under the pre-alert's case."""
+        _, pre_response = pre_alert.result()
+        payload = {**analysis, "injury_description": report}
+        if pre_response.get("case_id"):
+            payload["case_id"] = pre_response["case_id"]
+        return self._notify_hospital(trace_id, payload, "update")
+
     def analyze_patient(self, report):
-        """Main analysis pipeline."""
+        """
+        Main analysis pipeline.
+
+        The oracle decision and hospital pre-alert start as soon as the
+        report and vitals are known and run alongside the interactive
+        protocol; protocol results and the ETA follow as updates.
+
+        Every agent call is timed into an `agent.*` histogram and the whole
+        pipeline into `pipeline.analyze_patient`.
+        """
+        with self.metrics.timer("pipeline.analyze_patient"):
+            return self._analyze_patient(report)
+
+    def _analyze_patient(self, report):
+        if not len(self.vitals_history):
+            raise RuntimeError("No vital signs received yet; cannot analyze the patient")
+        m = self.metrics
+        m.count("pipeline.analyses")
         self.session.add_event("paramedic_report", report)
         self.memory_bank.save("paramedic_report", report)
 
-        current_vitals = self.vitals_history[-1]
-        severity = self.severity.estimate(current_vitals)
-        trend = self.compactor.summarize(self.vitals_history)
-        specialists = self.specialty.assign_specialists(report, current_vitals)
+        with self._vitals_lock:
+            reading = self.vitals_history[-1]
+            # The buffer's acquisition time is kept for the decision record only
+            current_vitals = {k: v for k, v in reading.items() if k != "ts"}
+            with m.timer("agent.severity"):
+                severity = self.severity.estimate(current_vitals)
+            with m.timer("agent.trend"):
+                trend = self.compactor.summarize(self.vitals_history)
+        m.gauge("patient.severity", severity)
+        m.gauge("vitals.buffered", len(self.vitals_history))
+
+        with m.timer("agent.keywords"):
+            matches = self.guidance.index.scan(report)
+        with m.timer("agent.specialists"):
+            specialists = self.specialty.assign_specialists(report, current_vitals, matches)
+        with m.timer("agent.protocol_select"):
+            protocol_name = self.guidance.select_protocol(report, matches)
+        trace_id = str(uuid.uuid4())
+
+        # Stage 1: oracle + hospital pre-alert, concurrently with the protocol
+        pre_alert = self.pipeline.submit(
+            self._pre_alert, trace_id, report, current_vitals, severity, trend, specialists
+        )
+        pre_alert.add_done_callback(self._announce_pre_alert)
 
         # Display visual status
         self.display_visual_status(current_vitals, severity, trend)
 
-        # Execute protocol
-        protocol_name = self.guidance.select_protocol(report)
-        protocol_result = self.execute_protocol(protocol_name, report)
-
-        # Oracle decision
-        oracle_out = self.oracle.analyze(
-            report=report,
-            vitals=current_vitals,
-            severity_score=severity,
-            trend=trend,
-            specialists=specialists
-        )
+        # Stage 2: interactive protocol
+        with m.timer("agent.protocol"):
+            protocol_result = self.execute_protocol(protocol_name, report)
+
+        with m.timer("pipeline.pre_alert_wait"):
+            oracle_out, response = pre_alert.result()
+        # What was decided and from which reading, for aegis_replay.py
+        self.memory_bank.save("decision", {
+            "trace_id": trace_id,
+            "case_id": response.get("case_id"),
+            "vitals": reading,
+            "severity_score": severity,
+            "trend": trend,
+            "specialists": specialists,
+            "protocol": protocol_name,
+            "ward": oracle_out["ward"],
+            "assigned_ward": response.get("assigned_ward")
+        })
         oracle_out["protocol_execution"] = protocol_result
-
         self.last_analysis = oracle_out
 
-        # Save for dashboard
-        with open(os.path.join(PROJECT_ROOT, "last_analysis.json"), "w") as f:
-            json.dump(oracle_out, f, indent=2)
+        # Stage 3: stream protocol results while the medic is asked for ETA
+        protocol_update = self.pipeline.submit(
+            self._send_update, trace_id, pre_alert, report, dict(oracle_out)
+        )
+        self.pipeline.submit(self._save_last_analysis, dict(oracle_out))
 
-        # Hospital notification
         print("\n" + "="*50)
         print("🏥 HOSPITAL NOTIFICATION")
         print("="*50)
-        
-        msg = A2AMessage(
-            from_agent="AEGIS",
-            to_agent="HospitalAI",
-            payload={
-                **oracle_out,
-                "injury_description": report
-            },
-            trace_id=str(uuid.uuid4())
-        )
 
-        response = self.router.send(msg, target_client=self.hospital_client)
-        self.memory_bank.save("hospital_response", response)
+        self.tts.say(
+            PROMPTS["hospital_notified"].format(ward=oracle_out["ward"]),
+            coalesce_key="hospital_status"
+        )
 
-        self.tts.speak(f"Hospital notified. {oracle_out['ward']} ward confirmed. Specialists are being mobilized.")
-        
         if response.get("specialists"):
             print(f"📋 Specialists assigned: {', '.join([s['specialty'] for s in response['specialists']])}")
-        
+
         print("="*50 + "\n")
 
         # Collect ETA
-        eta = self.collect_eta()
+        with m.timer("agent.eta"):
+            eta = self.collect_eta()
         oracle_out["eta_minutes"] = eta
 
+        protocol_update.result()
+        response = self._send_update(trace_id, pre_alert, report, oracle_out)
+
         return oracle_out, response
 
+    def _announce_pre_alert(self, future):
+        if future.exception() is not None:
+            print(f"⚠️ Hospital pre-alert failed: {future.exception()}")
+            return
+        oracle_out, response = future.result()
+        if response.get("error"):
+            print(f"⚠️ Hospital pre-alert error: {response['error']}")
+        else:
+            print(f"🏥 Pre-alert delivered: {response.get('assigned_ward', oracle_out['ward'])} "
+                  f"(case {response.get('case_id', 'N/A')})")
+
     def run(self):
         """Main operational loop."""
         print("\n" + "="*60)
         print("🛡️ A.E.G.I.S ONLINE")
         print("="*60)
-        self.tts.speak("AEGIS system online. All agents initialized.")
-        print("="*60 + "\n")
-
-        # Collect vitals for 10 seconds
-        print("📊 Collecting vital signs for 10 seconds...\n")
-        start = time.time()
-        count = 1
-
-        while time.time() - start < 10:
-            vitals = self.ingest_vitals()
-            self.vitals_history.append(vitals)
-            self.session.add_event("vitals", vitals)
-            self.memory_bank.save("vitals", vitals)
-            print(f"[{count:02d}] Vitals: HR={vitals['hr']} BP={vitals['bp_systolic']} SpO2={vitals['spo2']}%")
-            count += 1
-            time.sleep(1)
-
-        print("\n✅ Vitals collection complete.\n")
-
-        # Get injury report
-        self.tts.speak("AEGIS ready. Describe the patient's visible injuries.")
+
+        self.metrics_exporter.start()
+
+        # Vitals first; microphone, speech, oracle and hospital link warm up meanwhile
+        print(f"📊 Streaming vital signs at {self.vitals_rate_hz:g} Hz...\n")
+        self._echo_vitals = True
+        self.start_vitals()
+        self.prewarm()
+
+        self.tts.speak(PROMPTS["online"])
+        self._first_vitals.wait(timeout=5)
+        first = self.startup.get("first_vitals")
+        if first:
+            print(f"⏱️ First vital sign {first['at'] * 1000:.0f} ms after start\n")
+
+        # Get injury report while vitals keep coming in
+        self.tts.speak(PROMPTS["ready"])
         print("🎤 Listening for injury description...")
         
         paramedic_report = self.asr.listen(timeout=20, phrase_time_limit=20)
@@ -287,22 +663,62 @@ class AEGIS:
             print("⚠️ No report received. Using default scenario.")
             paramedic_report = "Male, 35 years old, fell 20 feet from scaffolding. Visible chest deformity, paradoxical breathing, severe respiratory distress."
         
+        if not self._first_vitals.is_set():
+            print("⏳ Waiting for the first vital sign...")
+            if not self._first_vitals.wait(timeout=FIRST_VITALS_TIMEOUT):
+                print(f"❌ No vital signs after {FIRST_VITALS_TIMEOUT:g}s; check the monitor link. Aborting analysis.")
+                self.stop_vitals()
+                self.metrics_exporter.close()
+                return None
+
+        self._echo_vitals = False
+        print(f"\n✅ {self.vitals_history.total_count} vital sign readings so far; monitoring continues.\n")
         print(f"📝 Report: {paramedic_report}\n")
 
         # Analyze
-        return self.analyze_patient(paramedic_report)
+        try:
+            return self.analyze_patient(paramedic_report)
+        finally:
+            self.stop_vitals()
+            self.metrics_exporter.close()
+
+    def close(self):
+        """Stops background work and flushes the state files."""
+        self.stop_vitals()
+        self.metrics_exporter.close()
+        self.pipeline.shutdown(wait=True)
+        self.session.flush()
+        self.guidance.registry.stop()
+        # Only what was actually built
+        for name in ("oracle", "memory_bank"):
+            if name in self._components:
+                self._components[name].close()
+        if self._own_log_writer is not None:
+            self._own_log_writer.close()
 
 
 if __name__ == "__main__":
     aegis = AEGIS()
-    final, hospital = aegis.run()
-    
+    try:
+        outcome = aegis.run()
+    finally:
+        aegis.close()
+    if outcome is None:
+        raise SystemExit(1)
+    final, hospital = outcome
+
     print("\n" + "="*60)
     print("✅ SESSION COMPLETED")
     print("="*60)
-    print(f"• {len(aegis.vitals_history)} vital sign readings logged")
+    print(f"• {aegis.vitals_history.total_count} vital sign readings logged")
     print(f"• {final['protocol_execution']['protocol']} executed ({final['protocol_execution']['success_rate']:.0f}% success rate)")
     print(f"• Hospital {final['ward']} confirmed with {len(hospital.get('specialists', []))} specialists mobilized")
     print(f"• Complete A2A message logs saved")
     print(f"• ETA: {final.get('eta_minutes', 'N/A')} minutes")
+    pipeline = aegis.metrics.histogram("pipeline.analyze_patient")
+    oracle = aegis.metrics.histogram("agent.oracle")
+    print(f"• Pipeline {pipeline['max']:.1f}s, oracle p50 {oracle['p50'] * 1000:.1f} ms (metrics.json)")
+    print("\n⏱️ STARTUP (seconds since start)")
+    for name, step in aegis.startup_report().items():
+        print(f"   {name:<16} at {step['at']:7.3f}s  took {step['seconds'] * 1000:8.1f} ms  [{step['thread']}]")
     print("="*60 + "\n")
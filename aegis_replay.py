@@ -0,0 +1,332 @@
+# aegis_replay.py
+import argparse
+import collections
+import functools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from agents.context_compactor import ContextCompactor
+from agents.multi_speciality import MultiSpecialityCoordinator
+from agents.severity_estimator import SeverityEstimator
+from agents.paramedic_guidance_agent import ParamedicGuidanceAgent
+
+from core.a2a import A2A_LOG_PATH, iter_a2a_log
+from core.ingestion import ReplayVitalsSource
+from core.sessions import iter_memory_bank
+from core.vitals_buffer import VitalsBuffer
+
+from oracle.gemini_oracle_stub import GeminiOracle
+from tools.headless import InProcessHospital
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+MEMORY_BANK_PATH = os.path.join(PROJECT_ROOT, "memory_bank.json")
+
+# Decisions compared between the recorded run and the replay
+DECISION_FIELDS = ("severity_score", "trend", "specialists", "protocol", "ward", "assigned_ward")
+TREND_KEYS = ("bp_trend", "hr_trend", "spo2_trend")
+MAX_VITALS = 3600  # same window as the live vitals buffer
+
+
+def _epoch(ts):
+    if isinstance(ts, str):
+        return datetime.fromisoformat(ts).timestamp()
+    return ts
+
+
+def _normalize(decision):
+    """Comparable form: trend labels only, specialists as a sorted list."""
+    out = {}
+    for field in DECISION_FIELDS:
+        value = decision.get(field)
+        if value is None:
+            continue
+        if field == "trend":
+            value = {k: value.get(k) for k in TREND_KEYS} if isinstance(value, dict) else value
+        elif field == "specialists":
+            value = sorted(s["specialty"] if isinstance(s, dict) else s for s in value)
+        out[field] = value
+    return out
+
+
+def _legacy_decisions(a2a_log, protocol_keys):
+    """
+    Recorded decisions of runs made before "decision" events existed,
+    rebuilt from the A2A log (one per trace id). Keyed by hospital case id
+    and report, in log order: simulator case ids only have one-second
+    resolution, so a key can repeat and is consumed first-in, first-out.
+    """
+    traces = {}
+    for entry in iter_a2a_log(a2a_log):
+        payload = entry.get("payload") or {}
+        result = entry.get("result") or {}
+        decision = traces.setdefault(entry.get("trace_id"), {})
+        case_id = payload.get("case_id") or result.get("case_id")
+        if case_id:
+            decision.setdefault("case_id", case_id)
+        decision.setdefault("report", payload.get("injury_description"))
+        if payload.get("stage", "pre_alert") == "pre_alert":
+            decision.update({
+                "severity_score": payload.get("severity_score"),
+                "trend": payload.get("trend"),
+                "specialists": payload.get("specialists_required"),
+                "ward": payload.get("ward"),
+                "assigned_ward": result.get("assigned_ward")
+            })
+        executed = (payload.get("protocol_execution") or {}).get("protocol")
+        if executed in protocol_keys:
+            decision["protocol"] = protocol_keys[executed]
+
+    decisions = collections.defaultdict(collections.deque)
+    for decision in traces.values():
+        decisions[decision.pop("case_id", None), decision.pop("report", None)].append(decision)
+    return decisions
+
+
+def load_recordings(memory_bank=MEMORY_BANK_PATH, a2a_log=A2A_LOG_PATH, since=0, limit=None, ids=None):
+    """
+    Splits a MemoryBank store into recorded sessions.
+
+    A session is the vitals leading up to a paramedic report, the report
+    itself and what AEGIS decided: its "decision" event, or for older
+    runs the pre-alert found in the A2A log under the same hospital case
+    id. Vitals logged after a session's last hospital response belong to
+    the next session. Yields dicts (picklable, for the process pool).
+    """
+    ids = set(ids) if ids else None
+    legacy = None
+    pending = collections.deque(maxlen=MAX_VITALS)
+    current = None
+    emitted = 0
+
+    def finish(session):
+        nonlocal legacy
+        original = session.pop("decision")
+        if original is not None:
+            session["decision_vitals"] = original.get("vitals")
+        elif session["case_id"]:
+            if legacy is None:
+                names = {p.name: p.key for p in ParamedicGuidanceAgent().registry}
+                legacy = _legacy_decisions(a2a_log, names)
+            queue = legacy.get((session["case_id"], session["report"]))
+            original = queue.popleft() if queue else None
+        session["original"] = _normalize(original or {})
+        if session["hospital_ward"] and "assigned_ward" not in session["original"]:
+            session["original"]["assigned_ward"] = session["hospital_ward"]
+        del session["hospital_ward"]
+        return session
+
+    for seq, entry in enumerate(iter_memory_bank(memory_bank, since=since), start=since):
+        kind, payload = entry.get("type"), entry.get("payload")
+
+        if kind == "vitals":
+            reading = {**payload, "ts": payload.get("ts") or _epoch(entry.get("ts"))}
+            (current["after"] if current else pending).append(reading)
+
+        elif kind == "paramedic_report":
+            if current is not None:
+                pending.extend(current.pop("after"))
+                done = finish(current)
+                if ids is None or done["id"] in ids:
+                    yield done
+                    emitted += 1
+                    if limit is not None and emitted >= limit:
+                        return
+            current = {
+                "id": f"seq{seq}", "seq": seq, "case_id": None, "report": payload,
+                "vitals": list(pending), "decision": None, "hospital_ward": None,
+                "after": collections.deque(maxlen=MAX_VITALS)
+            }
+            pending.clear()
+
+        elif kind == "decision" and current is not None:
+            current["decision"] = payload
+            if payload.get("case_id"):
+                current["case_id"] = payload["case_id"]
+                current["id"] = payload["case_id"]
+
+        elif kind == "hospital_response" and current is not None:
+            if isinstance(payload, dict) and payload.get("case_id"):
+                if current["case_id"] is None:
+                    current["case_id"] = current["id"] = payload["case_id"]
+                if current["hospital_ward"] is None:
+                    current["hospital_ward"] = payload.get("assigned_ward")
+            # Vitals so far were still this patient's
+            current["after"].clear()
+
+    if current is not None:
+        del current["after"]
+        done = finish(current)
+        if ids is None or done["id"] in ids:
+            yield done
+
+
+_agents = None
+
+
+def _shared_agents():
+    """Stateless agents, built once per worker process."""
+    global _agents
+    if _agents is None:
+        _agents = {
+            "severity": SeverityEstimator(),
+            "specialty": MultiSpecialityCoordinator(),
+            "guidance": ParamedicGuidanceAgent(),
+            "oracle": GeminiOracle(),
+            "hospital": InProcessHospital()
+        }
+    return _agents
+
+
+def replay_session(recording, speed=None, hospital=True):
+    """
+    Streams one recording back through the agents, as AEGIS would have
+    processed it live, and diffs the decisions against the original.
+    `speed` scales the recorded vitals gaps (None: as fast as possible).
+    Only the vitals the memory bank kept are streamed: every reading up to
+    one per `AEGIS.persist_interval`, a thinner history above that rate.
+    """
+    start = time.perf_counter()
+    agents = _shared_agents()
+    buffer = VitalsBuffer(capacity=MAX_VITALS, tiers=[(60, 1440)])
+    compactor = ContextCompactor()
+
+    vitals = list(recording["vitals"])
+    # The reading the original decision was made on, if it was not persisted
+    decided_on = recording.get("decision_vitals") or {}
+    if decided_on.get("ts") and (not vitals or decided_on["ts"] > vitals[-1]["ts"]):
+        vitals.append(decided_on)
+    source = ReplayVitalsSource(records=vitals, speed=speed)
+    while True:
+        reading = source.read()
+        if reading is None:
+            break
+        buffer.append(reading, ts=reading["ts"])
+        compactor.summarize(buffer)
+
+    result = {"id": recording["id"], "seq": recording["seq"]}
+    if not len(buffer):
+        result.update(changed=False, error="no vitals recorded before the report")
+        return result
+
+    report = recording["report"]
+    current_vitals = buffer[-1]
+    severity = agents["severity"].estimate(current_vitals)
+    trend = compactor.summarize(buffer)
+    guidance = agents["guidance"]
+    matches = guidance.index.scan(report)
+    specialists = agents["specialty"].assign_specialists(report, current_vitals, matches)
+    protocol = guidance.select_protocol(report, matches)
+    oracle_out = agents["oracle"].analyze(
+        report=report,
+        vitals=current_vitals,
+        severity_score=severity,
+        trend=trend,
+        specialists=specialists
+    )
+
+    replayed = {
+        "severity_score": severity,
+        "trend": trend,
+        "specialists": specialists,
+        "protocol": protocol,
+        "ward": oracle_out["ward"]
+    }
+    if hospital:
+        response = agents["hospital"].handoff({**oracle_out, "injury_description": report, "stage": "replay"})
+        replayed["assigned_ward"] = response.get("assigned_ward")
+
+    replayed = _normalize(replayed)
+    original = recording["original"]
+    diff = {
+        field: {"original": original[field], "replayed": replayed[field]}
+        for field in DECISION_FIELDS
+        if field in original and field in replayed and original[field] != replayed[field]
+    }
+    result.update(changed=bool(diff), diff=diff, replayed=replayed, elapsed_s=time.perf_counter() - start)
+    return result
+
+
+class ReplayEngine:
+    """
+    Replays recorded sessions through the current agents and rules.
+
+    Recordings are spread over a process pool of `workers` (1 replays
+    in-process), each worker building the agents once. `speed` is the
+    replay clock: None for as fast as possible, 60.0 for a minute of
+    recorded vitals per second. `run()` returns a summary with one diff
+    per changed session (every session with `include_unchanged`).
+    """
+
+    def __init__(self, workers=None, speed=None, hospital=True, chunksize=16, include_unchanged=False):
+        self.workers = workers or os.cpu_count() or 1
+        self.speed = speed or None
+        self.hospital = hospital
+        self.chunksize = chunksize
+        self.include_unchanged = include_unchanged
+
+    def run(self, recordings):
+        start = time.perf_counter()
+        replay = functools.partial(replay_session, speed=self.speed, hospital=self.hospital)
+        if self.workers == 1:
+            results = [replay(r) for r in recordings]
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(replay, recordings, chunksize=self.chunksize))
+        elapsed = time.perf_counter() - start
+
+        fields = collections.Counter(field for r in results for field in r.get("diff", {}))
+        changed = sum(1 for r in results if r["changed"])
+        skipped = sum(1 for r in results if "error" in r)
+        return {
+            "replays": len(results),
+            "changed": changed,
+            "unchanged": len(results) - changed - skipped,
+            "skipped": skipped,
+            "fields": dict(fields),
+            "elapsed_s": elapsed,
+            "replays_per_s": len(results) / elapsed if elapsed > 0 else 0.0,
+            "workers": self.workers,
+            "speed": self.speed,
+            "results": [r for r in results if self.include_unchanged or r["changed"] or "error" in r]
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded AEGIS sessions and diff their decisions.")
+    parser.add_argument("--memory-bank", default=MEMORY_BANK_PATH)
+    parser.add_argument("--a2a-log", default=A2A_LOG_PATH)
+    parser.add_argument("--since", type=int, default=0, help="first memory bank entry to read")
+    parser.add_argument("--limit", type=int, help="replay at most this many sessions")
+    parser.add_argument("--speed", type=float, help="replay clock multiplier (default: as fast as possible)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--no-hospital", action="store_true", help="skip the in-process hospital handoff")
+    parser.add_argument("--all", action="store_true", help="list unchanged sessions too")
+    parser.add_argument("--out", help="write the summary and diffs as JSON")
+    args = parser.parse_args()
+
+    recordings = load_recordings(args.memory_bank, args.a2a_log, since=args.since, limit=args.limit)
+    engine = ReplayEngine(workers=args.workers, speed=args.speed, hospital=not args.no_hospital,
+                          include_unchanged=args.all)
+    summary = engine.run(recordings)
+
+    print("\n" + "="*60)
+    print(f"🔁 REPLAY: {summary['replays']} sessions in {summary['elapsed_s']:.2f}s "
+          f"({summary['replays_per_s']:.0f}/s on {summary['workers']} workers)")
+    print("="*60)
+    for result in summary["results"]:
+        if "error" in result:
+            print(f"[{result['id']}] skipped: {result['error']}")
+            continue
+        for field, change in result["diff"].items():
+            print(f"[{result['id']}] {field}: {change['original']} -> {change['replayed']}")
+    print(f"• {summary['unchanged']} unchanged, {summary['changed']} changed, {summary['skipped']} skipped")
+    if summary["fields"]:
+        print("• Changed fields: " + ", ".join(f"{k} ({v})" for k, v in sorted(summary["fields"].items())))
+    print("="*60 + "\n")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(summary, f, indent=2)
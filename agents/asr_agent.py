@@ -1,19 +1,264 @@
 # agents/asr_agent.py
+import array
+import math
+import operator
+import queue
+import sys
+import threading
+import time
+
 import speech_recognition as sr
 
+from agents.asr_backends import COMMAND_WORDS, GoogleBackend
+
+
+_SAMPLE_TYPES = {1: "b", 2: "h", 4: "i"}
+
+
+def _rms(buffer, sample_width):
+    """RMS of signed little-endian PCM, as audioop.rms (gone in Python 3.13) computed it."""
+    samples = array.array(_SAMPLE_TYPES[sample_width])
+    samples.frombytes(buffer[:len(buffer) - len(buffer) % sample_width])
+    if not samples:
+        return 0
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return int(math.sqrt(sum(map(operator.mul, samples, samples)) / len(samples)))
+
+
+class _EnergyTap:
+    """Wraps a microphone stream and reports the RMS energy of every read."""
+
+    def __init__(self, stream, sample_width, on_energy):
+        self._stream = stream
+        self._sample_width = sample_width
+        self._on_energy = on_energy
+
+    def read(self, size):
+        buffer = self._stream.read(size)
+        self._on_energy(_rms(buffer, self._sample_width), len(buffer))
+        return buffer
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
 
 class ASRAgent:
     """
     Converts paramedic speech to text with robust error handling.
+
+    With `persistent=True` one microphone stream stays open in a background
+    thread: the noise floor is calibrated once, recalibrated every
+    `recalibrate_interval` seconds or when the dynamic threshold drifts by
+    more than `drift_ratio`, and phrases are captured continuously so
+    `listen()` only waits for the phrase itself to finish. Phrases that
+    started before `listen()` are stale (e.g. our own prompt), except
+    within `max_phrase_age` seconds: phrase starts are estimated from
+    their length and include about 0.5 s of recognizer pre-roll, so a
+    quick answer would otherwise be dropped. A phrase that starts while
+    `listen()` waits is capped at that call's `phrase_time_limit`; other
+    phrases at the agent's own `phrase_time_limit`.
+
+    Recognition goes through a pluggable `backend` (Google by default).
+    Given a streaming backend plus a chunk `source` (e.g. VoskBackend with
+    a MicrophoneSource or WavFileSource), `listen()` streams instead,
+    printing partial hypotheses and returning as soon as one contains a
+    command word from `stop_words`.
+
+    In persistent mode, callbacks registered with `on_speech()` fire at
+    speech onset (energy above `barge_in_ratio` x the noise threshold for
+    `barge_in_ms`), which lets TTS stop talking when the medic does. While
+    `playback()` reports our own TTS playing, the threshold is raised a
+    further `echo_ratio` x so the speaker's echo does not interrupt itself.
+    A phrase that barged in up to `barge_in_grace` seconds before
+    `listen()` is kept rather than dropped as stale. Streaming mode reads
+    the microphone only inside `listen()`, so it has no barge-in.
     """
 
-    def __init__(self):
+    def __init__(self, persistent=False, recalibrate_interval=60.0, drift_ratio=0.5,
+                 max_phrase_age=1.0, phrase_time_limit=20,
+                 backend=None, source=None, stop_words=COMMAND_WORDS,
+                 barge_in_ratio=1.5, barge_in_ms=200, barge_in_grace=5.0,
+                 echo_ratio=2.0, playback=None):
         self.recognizer = sr.Recognizer()
         # Adjust for better recognition
         self.recognizer.energy_threshold = 4000
         self.recognizer.dynamic_energy_threshold = True
         self.recognizer.pause_threshold = 0.8
 
+        self.backend = backend or GoogleBackend(self.recognizer)
+        self.source = source
+        self.stop_words = stop_words
+
+        self.barge_in_ratio = barge_in_ratio
+        self.barge_in_ms = barge_in_ms
+        self.barge_in_grace = barge_in_grace
+        self.echo_ratio = echo_ratio
+        self.playback = playback
+        self._barge_in_at = None
+        self._speech_listeners = []
+        self._loud_ms = 0.0
+        self._in_speech = False
+        self._calibrating = False
+
+        self.recalibrate_interval = recalibrate_interval
+        self.drift_ratio = drift_ratio
+        self.max_phrase_age = max_phrase_age
+        self.phrase_time_limit = phrase_time_limit
+
+        self.calibrated_threshold = None
+        self._last_calibration = 0.0
+        self._phrases = queue.Queue()
+        self._waiting = threading.Event()
+        self._waiting_limit = None  # phrase_time_limit of the listen() waiting, if any
+        self._stop = threading.Event()
+        self._capture_thread = None
+
+        if persistent and source is None:
+            self.start()
+
+    @property
+    def capturing(self):
+        return self._capture_thread is not None and self._capture_thread.is_alive()
+
+    def start(self):
+        """Open the microphone once and start continuous capture."""
+        if self.capturing:
+            return
+        self._stop.clear()
+        self._capture_thread = threading.Thread(target=self._capture_loop, name="asr-capture", daemon=True)
+        self._capture_thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._capture_thread is not None:
+            self._capture_thread.join(timeout=2)
+        self._capture_thread = None
+
+    @property
+    def barge_in(self):
+        """Whether speech onset can be detected (persistent capture only)."""
+        return self.source is None
+
+    def on_speech(self, callback):
+        """Registers `callback()` to run whenever speech onset is detected."""
+        self._speech_listeners.append(callback)
+
+    def _on_energy(self, energy, nbytes, source):
+        if self._calibrating or not self._speech_listeners:
+            return
+        chunk_ms = 1000 * nbytes / (source.SAMPLE_RATE * source.SAMPLE_WIDTH)
+        threshold = self.recognizer.energy_threshold * self.barge_in_ratio
+        if self.playback is not None and self.playback():
+            # Our own prompt comes back through the mic; only louder speech counts
+            threshold *= self.echo_ratio
+        if energy > threshold:
+            self._loud_ms += chunk_ms
+        else:
+            self._loud_ms = 0.0
+            self._in_speech = False
+
+        if self._loud_ms >= self.barge_in_ms and not self._in_speech:
+            self._in_speech = True
+            self._barge_in_at = time.monotonic()
+            for callback in self._speech_listeners:
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"⚠️ Speech listener failed: {e}")
+
+    def _calibrate(self, source, duration):
+        self._calibrating = True
+        try:
+            self.recognizer.adjust_for_ambient_noise(source, duration=duration)
+        finally:
+            self._calibrating = False
+        self.calibrated_threshold = self.recognizer.energy_threshold
+        self._last_calibration = time.monotonic()
+
+    def _needs_recalibration(self):
+        if self._waiting.is_set():
+            # Never eat the start of an answer we are waiting for
+            return False
+        if time.monotonic() - self._last_calibration >= self.recalibrate_interval:
+            return True
+        baseline = self.calibrated_threshold or 1
+        return abs(self.recognizer.energy_threshold - baseline) / baseline > self.drift_ratio
+
+    def _capture_loop(self):
+        try:
+            with sr.Microphone() as source:
+                source.stream = _EnergyTap(
+                    source.stream, source.SAMPLE_WIDTH,
+                    lambda energy, nbytes: self._on_energy(energy, nbytes, source)
+                )
+                print("🎤 Calibrating for ambient noise... Please wait.")
+                self._calibrate(source, duration=1)
+
+                while not self._stop.is_set():
+                    if self._needs_recalibration():
+                        self._calibrate(source, duration=0.5)
+                    try:
+                        audio = self.recognizer.listen(
+                            source,
+                            timeout=1,
+                            phrase_time_limit=self._waiting_limit or self.phrase_time_limit
+                        )
+                    except sr.WaitTimeoutError:
+                        continue
+
+                    ended = time.monotonic()
+                    duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+                    self._phrases.put((ended - duration, audio))
+        except Exception as e:
+            print(f"⚠️ Microphone capture stopped: {e}")
+
+    def _next_phrase(self, timeout, phrase_time_limit):
+        """Waits for a buffered phrase that started after this call."""
+        called = time.monotonic()
+        deadline = called + timeout + phrase_time_limit
+        earliest = called - self.max_phrase_age
+        barged_in = self._barge_in_at
+        if barged_in is not None and called - barged_in <= self.barge_in_grace:
+            # The medic talked over the prompt: keep that answer. Phrase starts
+            # include the onset delay and the recognizer's pre-roll.
+            onset = barged_in - self.barge_in_ms / 1000 - self.recognizer.non_speaking_duration
+            earliest = min(earliest, onset - 0.25)
+        # The capture thread reads this when it starts listening for the next
+        # phrase, at least once a second while the room is quiet
+        self._waiting_limit = phrase_time_limit
+        self._waiting.set()
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+                try:
+                    started, audio = self._phrases.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+                # Drop stale audio, e.g. our own TTS prompt picked up by the mic
+                if started >= earliest:
+                    self._barge_in_at = None
+                    return audio
+        finally:
+            self._waiting.clear()
+            self._waiting_limit = None
+
+    def _listen_streaming(self, timeout, phrase_time_limit):
+        text = ""
+        chunks = self.source.chunks(max_seconds=timeout + phrase_time_limit)
+        for hypothesis in self.backend.stream(chunks, stop_words=self.stop_words,
+                                              sample_rate=self.source.sample_rate):
+            if not hypothesis.final:
+                print(f"   … {hypothesis.text}")
+                continue
+            text = hypothesis.text
+            break
+        if not text:
+            raise sr.WaitTimeoutError("no speech recognized before the deadline")
+        return text
+
     def listen(self, timeout=5, phrase_time_limit=10):
         """
         Listen for speech input with timeout and phrase limits.
@@ -26,22 +271,29 @@ class ASRAgent:
             String of recognized text or empty string on failure
         """
         try:
-            with sr.Microphone() as source:
-                print("🎤 Adjusting for ambient noise... Please wait.")
-                # Adjust for ambient noise with duration
-                self.recognizer.adjust_for_ambient_noise(source, duration=1)
+            if self.source is not None and self.backend.streaming:
+                print("🎤 Listening (streaming)...")
+                return self._listen_streaming(timeout, phrase_time_limit)
 
+            if self.capturing:
                 print("🎤 Listening...")
-                audio = self.recognizer.listen(
-                    source,
-                    timeout=timeout,
-                    phrase_time_limit=phrase_time_limit
-                )
+                audio = self._next_phrase(timeout, phrase_time_limit)
+            else:
+                with sr.Microphone() as source:
+                    print("🎤 Adjusting for ambient noise... Please wait.")
+                    # Adjust for ambient noise with duration
+                    self.recognizer.adjust_for_ambient_noise(source, duration=1)
+
+                    print("🎤 Listening...")
+                    audio = self.recognizer.listen(
+                        source,
+                        timeout=timeout,
+                        phrase_time_limit=phrase_time_limit
+                    )
 
-                print("🔄 Recognizing speech...")
-                # Use Google Speech Recognition
-                text = self.recognizer.recognize_google(audio, language='en-US')
-                return text
+            print("🔄 Recognizing speech...")
+            text = self.backend.recognize(audio)
+            return text
 
         except sr.WaitTimeoutError:
             print("⚠️ Listening timed out - no speech detected")
@@ -52,7 +304,7 @@ class ASRAgent:
             return ""
 
         except sr.RequestError as e:
-            print(f"⚠️ Could not request results from Google Speech Recognition service; {e}")
+            print(f"⚠️ Could not request results from speech recognition service; {e}")
             return ""
 
         except Exception as e:
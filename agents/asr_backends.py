@@ -0,0 +1,176 @@
+# agents/asr_backends.py
+import json
+import time
+import wave
+from collections import namedtuple
+
+# text: hypothesis so far; final: the recognizer committed to it
+Hypothesis = namedtuple("Hypothesis", ["text", "final"])
+
+COMMAND_WORDS = ("completed", "complete", "done", "failed", "failure")
+
+
+def _hits_command(text, stop_words):
+    return bool(stop_words) and any(word in stop_words for word in text.lower().split())
+
+
+class RecognizerBackend:
+    """
+    Pluggable speech-to-text backend used by ASRAgent.
+
+    `recognize()` turns a captured speech_recognition AudioData into text.
+    `stream()` consumes raw 16-bit mono PCM chunks at `sample_rate` (the
+    source's rate; default the backend's own) and yields Hypothesis
+    tuples; backends that cannot stream just yield one final result.
+    """
+
+    streaming = False
+    sample_rate = 16000
+
+    def recognize(self, audio):
+        raise NotImplementedError
+
+    def stream(self, chunks, stop_words=COMMAND_WORDS, sample_rate=None):
+        import speech_recognition as sr
+
+        pcm = b"".join(chunks)
+        if not pcm:
+            return
+        yield Hypothesis(self.recognize(sr.AudioData(pcm, sample_rate or self.sample_rate, 2)), True)
+
+
+class GoogleBackend(RecognizerBackend):
+    """Online Google Web Speech API (needs connectivity)."""
+
+    def __init__(self, recognizer=None, language="en-US"):
+        import speech_recognition as sr
+
+        self.recognizer = recognizer or sr.Recognizer()
+        self.language = language
+
+    def recognize(self, audio):
+        return self.recognizer.recognize_google(audio, language=self.language)
+
+
+class VoskBackend(RecognizerBackend):
+    """
+    Offline, streaming recognition with a local Vosk/Kaldi model.
+
+    Partial hypotheses are produced while the medic is still speaking, and
+    `stream()` ends early as soon as a command word shows up in one.
+    """
+
+    streaming = True
+
+    def __init__(self, model_path, sample_rate=16000):
+        from vosk import Model, SetLogLevel
+
+        SetLogLevel(-1)
+        self.model = Model(model_path)
+        self.sample_rate = sample_rate
+
+    def _new_recognizer(self, sample_rate=None):
+        from vosk import KaldiRecognizer
+
+        # Kaldi resamples from the input rate to the model's own
+        return KaldiRecognizer(self.model, sample_rate or self.sample_rate)
+
+    def recognize(self, audio):
+        import speech_recognition as sr
+
+        rec = self._new_recognizer()
+        rec.AcceptWaveform(audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2))
+        text = json.loads(rec.FinalResult()).get("text", "")
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+    def stream(self, chunks, stop_words=COMMAND_WORDS, sample_rate=None):
+        rec = self._new_recognizer(sample_rate)
+        for chunk in chunks:
+            if rec.AcceptWaveform(chunk):
+                text = json.loads(rec.Result()).get("text", "")
+                if text:
+                    yield Hypothesis(text, True)
+                continue
+
+            partial = json.loads(rec.PartialResult()).get("partial", "")
+            if not partial:
+                continue
+            if _hits_command(partial, stop_words):
+                # Early termination: no need to wait for end-of-utterance silence
+                yield Hypothesis(partial, True)
+                return
+            yield Hypothesis(partial, False)
+
+        text = json.loads(rec.FinalResult()).get("text", "")
+        if text:
+            yield Hypothesis(text, True)
+
+
+class WavFileSource:
+    """
+    Deterministic stand-in for the microphone: replays a 16-bit mono WAV
+    in fixed-size chunks, either as fast as possible or paced in real time.
+    """
+
+    def __init__(self, path, chunk_ms=100, realtime=False):
+        self.path = path
+        self.chunk_ms = chunk_ms
+        self.realtime = realtime
+        with wave.open(path, "rb") as wf:
+            if wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+                raise ValueError("WavFileSource expects 16-bit mono audio")
+            self.sample_rate = wf.getframerate()
+
+    def chunks(self, max_seconds=None):
+        frames_per_chunk = int(self.sample_rate * self.chunk_ms / 1000)
+        limit = None if max_seconds is None else int(max_seconds * self.sample_rate)
+        sent = 0
+        start = time.monotonic()
+
+        with wave.open(self.path, "rb") as wf:
+            while limit is None or sent < limit:
+                data = wf.readframes(frames_per_chunk)
+                if not data:
+                    return
+                sent += len(data) // 2
+                if self.realtime:
+                    delay = start + sent / self.sample_rate - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                yield data
+
+
+class MicrophoneSource:
+    """Live 16-bit mono PCM chunks from one long-lived PyAudio stream."""
+
+    def __init__(self, sample_rate=16000, chunk_ms=100, device_index=None):
+        import pyaudio
+
+        self.sample_rate = sample_rate
+        self.frames_per_chunk = int(sample_rate * chunk_ms / 1000)
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=sample_rate,
+            input=True,
+            input_device_index=device_index,
+            frames_per_buffer=self.frames_per_chunk
+        )
+
+    def chunks(self, max_seconds=None):
+        # Discard audio buffered before this call (e.g. our own TTS prompt)
+        stale = self._stream.get_read_available()
+        if stale:
+            self._stream.read(stale, exception_on_overflow=False)
+
+        deadline = None if max_seconds is None else time.monotonic() + max_seconds
+        while deadline is None or time.monotonic() < deadline:
+            yield self._stream.read(self.frames_per_chunk, exception_on_overflow=False)
+
+    def close(self):
+        self._stream.stop_stream()
+        self._stream.close()
+        self._audio.terminate()
@@ -1,28 +1,168 @@
 # agents/context_compactor.py
+from collections import deque
+
+
+class RollingTrend:
+    """
+    O(1)-per-reading trend state for a single vital sign.
+
+    Keeps the last `window` readings in a ring buffer together with running
+    sums, so the least-squares slope and variance over the window are
+    available in constant time. An EWMA tracks the smoothed level.
+    """
+
+    def __init__(self, window=30, alpha=0.2, deadband=2.0):
+        self.window = window
+        self.alpha = alpha
+        self.deadband = deadband
+
+        self.values = deque(maxlen=window)
+        self.ewma = None
+        self._sum_y = 0.0
+        self._sum_yy = 0.0
+        self._sum_xy = 0.0  # x is the position in the window, 0..n-1
+        self._evictions = 0
+
+    def update(self, value):
+        value = float(value)
+        self.ewma = value if self.ewma is None else self.alpha * value + (1 - self.alpha) * self.ewma
+
+        n = len(self.values)
+        if n < self.window:
+            self._sum_xy += n * value
+            self._sum_y += value
+            self._sum_yy += value * value
+            self.values.append(value)
+            return
+
+        # Window slides by one: every remaining reading moves down a position.
+        oldest = self.values[0]
+        self.values.append(value)
+        self._sum_xy += -(self._sum_y - oldest) + (n - 1) * value
+        self._sum_y += value - oldest
+        self._sum_yy += value * value - oldest * oldest
+
+        # Re-derive the sums once per window so float drift cannot build up.
+        self._evictions += 1
+        if self._evictions >= self.window:
+            self._evictions = 0
+            self._sum_y = sum(self.values)
+            self._sum_yy = sum(v * v for v in self.values)
+            self._sum_xy = sum(i * v for i, v in enumerate(self.values))
+
+    def slope(self):
+        """Least-squares change per reading over the window."""
+        n = len(self.values)
+        if n < 2:
+            return 0.0
+        sum_x = n * (n - 1) / 2
+        sum_xx = (n - 1) * n * (2 * n - 1) / 6
+        return (n * self._sum_xy - sum_x * self._sum_y) / (n * sum_xx - sum_x * sum_x)
+
+    def variance(self):
+        n = len(self.values)
+        if n < 2:
+            return 0.0
+        mean = self._sum_y / n
+        return max(self._sum_yy / n - mean * mean, 0.0)
+
+    def label(self):
+        """rising / falling / stable, from the fitted change across the window."""
+        n = len(self.values)
+        if n < 2:
+            return "stable"
+        change = self.slope() * (n - 1)
+        if change > self.deadband:
+            return "rising"
+        if change < -self.deadband:
+            return "falling"
+        return "stable"
+
+
 class ContextCompactor:
     """
     Analyzes vitals & compresses long history into a trend summary.
+
+    Readings are folded in incrementally, so each new reading and each
+    trend query costs O(1) regardless of how long the transport runs.
     """
 
+    VITALS = {
+        # key in vitals dict: (trend prefix, deadband)
+        "bp_systolic": ("bp", 2.0),
+        "hr": ("hr", 2.0),
+        "spo2": ("spo2", 1.0)
+    }
+
+    def __init__(self, window=30, alpha=0.2):
+        self.window = window
+        self.alpha = alpha
+        self.reset()
+
+    def update(self, vitals):
+        """Fold one reading into the rolling trend state."""
+        for key, trend in self.trends.items():
+            if key in vitals:
+                trend.update(vitals[key])
+        self._seen += 1
+
+    def reset(self):
+        self.trends = {
+            key: RollingTrend(window=self.window, alpha=self.alpha, deadband=deadband)
+            for key, (_, deadband) in self.VITALS.items()
+        }
+        self._seen = 0
+        self._source = None
+
+    def trend(self):
+        if not self._seen:
+            return "No vitals yet."
+
+        out = {}
+        for key, (prefix, _) in self.VITALS.items():
+            trend = self.trends[key]
+            out[f"{prefix}_trend"] = trend.label()
+            out[f"{prefix}_slope"] = trend.slope()
+            out[f"{prefix}_variance"] = trend.variance()
+            out[f"{prefix}_ewma"] = trend.ewma
+        return out
+
+    def update_columns(self, columns):
+        """Fold in columnar readings, e.g. a VitalsBuffer.window() slice."""
+        count = 0
+        for key, trend in self.trends.items():
+            values = columns.get(key)
+            if values is None:
+                continue
+            count = max(count, len(values))
+            for value in values:
+                if value == value:  # skip NaN gaps
+                    trend.update(value)
+        self._seen += count
+
     def summarize(self, vitals_list):
+        """
+        Backwards-compatible entry point taking the full vitals history,
+        either a list of dicts or a VitalsBuffer.
+
+        Only readings appended since the previous call are folded in, so
+        repeatedly passing the same growing history stays O(1) amortized.
+        """
         if not vitals_list:
             return "No vitals yet."
 
-        bp_values = [v["bp_systolic"] for v in vitals_list if "bp_systolic" in v]
-        hr_values = [v["hr"] for v in vitals_list if "hr" in v]
-        spo2_values = [v["spo2"] for v in vitals_list if "spo2" in v]
-
-        def trend(values):
-            if len(values) < 2:
-                return "stable"
-            if values[-1] > values[0]:
-                return "rising"
-            if values[-1] < values[0]:
-                return "falling"
-            return "stable"
+        total = getattr(vitals_list, "total_count", len(vitals_list))
+        if vitals_list is not self._source or total < self._seen:
+            self.reset()
+            self._source = vitals_list
 
-        return {
-            "bp_trend": trend(bp_values),
-            "hr_trend": trend(hr_values),
-            "spo2_trend": trend(spo2_values)
-        }
+        if hasattr(vitals_list, "window"):
+            new = total - self._seen
+            self.update_columns(vitals_list.window(new))
+            # Readings that already rotated out of the buffer are skipped.
+            self._seen = total
+        else:
+            for vitals in vitals_list[self._seen:]:
+                self.update(vitals)
+
+        return self.trend()
@@ -1,27 +1,21 @@
 # agents/multi_specialty.py
+from core.keywords import KEYWORDS
+
+
 class MultiSpecialityCoordinator:
     """
     Assigns medical specialists based on injury description + vitals.
     """
 
-    def assign_specialists(self, report: str, vitals: dict):
-        report = report.lower()
-        specialists = []
-
-        if "burn" in report:
-            specialists.append("Burns Specialist")
-
-        if "head" in report or "skull" in report:
-            specialists.append("Neurosurgeon")
-
-        if "chest" in report or "rib" in report:
-            specialists.append("Cardiothoracic Surgeon")
-
-        if "leg" in report or "fracture" in report:
-            specialists.append("Orthopedic Surgeon")
+    def __init__(self, index=KEYWORDS):
+        self.index = index
 
-        if "trauma" in report or "fall" in report:
-            specialists.append("Trauma Surgeon")
+    def assign_specialists(self, report: str, vitals: dict, matches=None):
+        """
+        `matches` may be a precomputed `index.scan(report)` shared with
+        protocol selection, so the report is only scanned once.
+        """
+        specialists = self.index.labels(report, "specialist", matches)
 
         specialists.append("Emergency Physician")
         specialists.append("Anesthesiologist")
@@ -0,0 +1,204 @@
+# agents/protocol_registry.py
+import json
+import os
+import threading
+from dataclasses import dataclass
+
+from core.keywords import RULES, KeywordIndex
+
+PROTOCOL_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'protocols'))
+DEFAULT_PROTOCOL = "general_trauma"
+
+
+class ProtocolError(ValueError):
+    """A protocol file is missing fields or is inconsistent."""
+
+
+@dataclass(frozen=True)
+class ProtocolStep:
+    __slots__ = ("id", "instruction", "success_response", "failure_response")
+    id: int
+    instruction: str
+    success_response: str
+    failure_response: str
+
+
+@dataclass(frozen=True)
+class Protocol:
+    __slots__ = ("key", "name", "priority", "keywords", "steps")
+    key: str
+    name: str
+    priority: int
+    keywords: tuple
+    steps: tuple
+
+
+def _require_text(doc, field, where):
+    value = doc.get(field)
+    if not isinstance(value, str) or not value.strip():
+        raise ProtocolError(f"{where}: '{field}' must be a non-empty string")
+    return value
+
+
+def parse_protocol(doc, where="<protocol>"):
+    """Validates one protocol document and returns a frozen Protocol."""
+    if not isinstance(doc, dict):
+        raise ProtocolError(f"{where}: expected a JSON object")
+
+    key = _require_text(doc, "key", where)
+    name = _require_text(doc, "name", where)
+    priority = doc.get("priority", 100)
+    if not isinstance(priority, int) or isinstance(priority, bool):
+        raise ProtocolError(f"{where}: 'priority' must be an integer")
+
+    keywords = doc.get("keywords", [])
+    if not isinstance(keywords, list) or not all(isinstance(k, str) and k.strip("*") for k in keywords):
+        raise ProtocolError(f"{where}: 'keywords' must be a list of words")
+
+    raw_steps = doc.get("steps")
+    if not isinstance(raw_steps, list) or not raw_steps:
+        raise ProtocolError(f"{where}: 'steps' must be a non-empty list")
+
+    steps = []
+    seen = set()
+    for i, raw in enumerate(raw_steps):
+        at = f"{where} step {i + 1}"
+        if not isinstance(raw, dict):
+            raise ProtocolError(f"{at}: expected a JSON object")
+        step_id = raw.get("id")
+        if not isinstance(step_id, int) or isinstance(step_id, bool):
+            raise ProtocolError(f"{at}: 'id' must be an integer")
+        if step_id in seen:
+            raise ProtocolError(f"{at}: duplicate step id {step_id}")
+        seen.add(step_id)
+        steps.append(ProtocolStep(
+            step_id,
+            _require_text(raw, "instruction", at),
+            _require_text(raw, "success_response", at),
+            _require_text(raw, "failure_response", at)
+        ))
+
+    return Protocol(key, name, priority, tuple(k.lower() for k in keywords), tuple(steps))
+
+
+class _Snapshot:
+    """One immutable, fully indexed generation of the registry."""
+
+    def __init__(self, protocols, files):
+        ordered = sorted(protocols, key=lambda p: (p.priority, p.key))
+        self.protocols = {p.key: p for p in ordered}
+        self.steps = {(p.key, s.id): s for p in ordered for s in p.steps}
+        self.files = files
+        rules = tuple(("protocol", p.key, p.keywords) for p in ordered if p.keywords)
+        self.index = KeywordIndex(rules + RULES)
+
+
+class ProtocolRegistry:
+    """
+    Protocols loaded from JSON files in `path`, validated once per load.
+
+    Each load builds a complete snapshot (protocols by key, a
+    (protocol, step_id) -> step index and a keyword index that includes
+    the protocols' keywords) and swaps it in with one reference
+    assignment, so lookups never take a lock and never see a half-loaded
+    library. `reload_if_changed()` (or the `watch()` thread) picks up
+    added, edited or removed files; a reload that fails validation keeps
+    the previous snapshot.
+    """
+
+    def __init__(self, path=PROTOCOL_DIR, default=DEFAULT_PROTOCOL):
+        self.path = path
+        self.default = default
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._rejected = None  # file state of the last reload that failed
+        self._stop = threading.Event()
+        self._snapshot = self._load()
+
+    def _scan_files(self):
+        files = {}
+        for entry in os.scandir(self.path):
+            if entry.is_file() and entry.name.endswith(".json"):
+                stat = entry.stat()
+                files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def _load(self):
+        files = self._scan_files()
+        protocols = []
+        keys = {}
+        for file_path in sorted(files):
+            where = os.path.basename(file_path)
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    doc = json.load(f)
+            except ValueError as e:
+                raise ProtocolError(f"{where}: invalid JSON: {e}")
+            protocol = parse_protocol(doc, where)
+            if protocol.key in keys:
+                raise ProtocolError(f"{where}: protocol '{protocol.key}' already defined in {keys[protocol.key]}")
+            keys[protocol.key] = where
+            protocols.append(protocol)
+
+        if self.default not in keys:
+            raise ProtocolError(f"default protocol '{self.default}' not found in {self.path}")
+        return _Snapshot(protocols, files)
+
+    def reload(self):
+        """Reloads every file now; raises ProtocolError and keeps the old snapshot on failure."""
+        with self._reload_lock:
+            self._snapshot = self._load()
+        return len(self._snapshot.protocols)
+
+    def reload_if_changed(self):
+        """Reloads when a protocol file was added, removed or modified."""
+        try:
+            files = self._scan_files()
+            if files == self._snapshot.files or files == self._rejected:
+                return False
+            self._rejected = files
+            self.reload()
+            self._rejected = None
+            print(f"📋 Protocol library reloaded: {len(self)} protocols")
+            return True
+        except (OSError, ProtocolError) as e:
+            print(f"⚠️ Protocol reload skipped: {e}")
+            return False
+
+    def watch(self, interval=2.0):
+        """Polls the protocol directory for changes in a daemon thread."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+
+        def loop():
+            while not self._stop.wait(interval):
+                self.reload_if_changed()
+
+        self._stop.clear()
+        self._watcher = threading.Thread(target=loop, name="protocol-watch", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def index(self):
+        return self._snapshot.index
+
+    def get(self, key):
+        return self._snapshot.protocols.get(key)
+
+    def step(self, key, step_id):
+        return self._snapshot.steps.get((key, step_id))
+
+    def keys(self):
+        return list(self._snapshot.protocols)
+
+    def __iter__(self):
+        return iter(list(self._snapshot.protocols.values()))
+
+    def __contains__(self, key):
+        return key in self._snapshot.protocols
+
+    def __len__(self):
+        return len(self._snapshot.protocols)
@@ -4,7 +4,13 @@ class SeverityEstimator:
     A simple ML stub scoring trauma severity.
     """
 
+    DEFAULTS = {"hr": 90, "bp_systolic": 120, "spo2": 98}
+
     def estimate(self, vitals):
+        if hasattr(vitals, "latest"):
+            # VitalsBuffer: score the most recent reading
+            vitals = vitals.latest() or {}
+
         hr = vitals.get("hr", 90)
         bp = vitals.get("bp_systolic", 120)
         spo2 = vitals.get("spo2", 98)
@@ -21,3 +27,39 @@ class SeverityEstimator:
             score = 9
 
         return score
+
+    def estimate_batch(self, hr, bp_systolic, spo2, return_shock_index=False):
+        """
+        Vectorized `estimate` over columnar readings.
+
+        Takes equal-length sequences (lists, array.array, memoryviews from
+        VitalsBuffer.window(), or NumPy arrays) and scores them in one
+        NumPy pass. NaN entries fall back to the same defaults as the
+        scalar path, so every score matches `estimate` exactly.
+        """
+        import numpy as np
+
+        hr = np.asarray(hr, dtype=np.float64)
+        bp = np.asarray(bp_systolic, dtype=np.float64)
+        spo2 = np.asarray(spo2, dtype=np.float64)
+
+        hr = np.where(np.isnan(hr), self.DEFAULTS["hr"], hr)
+        bp = np.where(np.isnan(bp), self.DEFAULTS["bp_systolic"], bp)
+        spo2 = np.where(np.isnan(spo2), self.DEFAULTS["spo2"], spo2)
+
+        shock_index = hr / np.maximum(bp, 1)
+
+        # Same precedence as the scalar branches: the last true rule wins.
+        score = np.full(shock_index.shape, 3, dtype=np.int8)
+        score[shock_index > 1.0] = 5
+        score[shock_index > 1.3] = 7
+        score[(bp < 90) | (spo2 < 92) | (shock_index > 1.5)] = 9
+
+        if return_shock_index:
+            return score, shock_index
+        return score
+
+    def estimate_buffer(self, buffer, n=None, return_shock_index=False):
+        """Scores the last `n` readings of a VitalsBuffer without copying them out."""
+        cols = buffer.window(n)
+        return self.estimate_batch(cols["hr"], cols["bp_systolic"], cols["spo2"], return_shock_index)
@@ -1,43 +1,344 @@
 # agents/tts_agent.py
-import pyttsx3
-from gtts import gTTS
-from playsound3 import playsound
+# pyttsx3, gtts and playsound3 are imported where used, so importing this
+# module (e.g. for the priorities) does not load the speech stack
+import atexit
+import hashlib
+import io
+import itertools
 import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import wave
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Speech priorities: lower plays first, and CRITICAL pre-empts anything else
+CRITICAL = 0
+ROUTINE = 10
+WARM = 20  # pre-rendering, behind anything waiting to be spoken
+
+
+class AudioClipCache:
+    """
+    Content-addressed LRU cache of rendered speech clips.
+
+    Clips are keyed by a hash of (mode, text) and evicted least recently
+    used first once their combined size exceeds `max_bytes`.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._clips = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(mode, text):
+        return hashlib.sha256(f"{mode}\0{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            clip = self._clips.get(key)
+            if clip is None:
+                self.misses += 1
+                return None
+            self._clips.move_to_end(key)
+            self.hits += 1
+            return clip
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._clips
+
+    def put(self, key, clip):
+        data = clip[0]
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._clips:
+                self.size -= len(self._clips.pop(key)[0])
+            self._clips[key] = clip
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, (old, _) = self._clips.popitem(last=False)
+                self.size -= len(old)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "clips": len(self._clips),
+                "bytes": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
 
 
 class TTSAgent:
     """
     Text-to-speech agent for providing audio feedback to paramedics.
+
+    Rendered clips are kept in an AudioClipCache, so fixed prompts are
+    synthesized once (ideally during `warm()` at startup) and then played
+    straight from memory; only novel text goes to the synthesizer.
+
+    Playback runs on a dedicated worker fed by a priority queue. `say()`
+    returns a Future (True once played, False if superseded or cut off)
+    so callers wait only when they must; `speak()` keeps the blocking
+    behaviour. A CRITICAL message pre-empts a routine one that is playing,
+    a queued message is dropped when a newer one with the same
+    `coalesce_key` arrives, and `interrupt()` (wired to ASR speech
+    detection) stops playback for barge-in.
+
+    SAPI5 and NSSpeechSynthesizer engines only work on the thread that
+    created them, so the pyttsx3 engine is created on the playback worker
+    and every render and playback runs there; `warm()` queues its
+    rendering to the worker too.
     """
 
-    def __init__(self, mode="offline"):
+    def __init__(self, mode="offline", cache_bytes=32 * 1024 * 1024):
         self.mode = mode
-        if mode == "offline":
-            self.engine = pyttsx3.init()
-            self.engine.setProperty("rate", 165)
-            self.engine.setProperty("volume", 0.9)
+        self.engine = None  # pyttsx3, created on the playback worker
+        self.cache = AudioClipCache(cache_bytes)
+        # Whether the pyttsx3 driver writes WAV (None until the first render);
+        # AIFF drivers (macOS) are not rendered or cached, only spoken
+        self._renders_wav = None
+        # Per-process scratch dir instead of one shared aegis_tts.mp3
+        self._tmp_dir = tempfile.mkdtemp(prefix=f"aegis_tts_{os.getpid()}_")
+        self._tmp_seq = itertools.count()
+        atexit.register(shutil.rmtree, self._tmp_dir, True)
+        self._pyaudio = None
+
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._pending = {}  # coalesce_key -> queued item
+        self._pending_lock = threading.Lock()
+        self._interrupt = threading.Event()
+        self._playing = None  # priority of the clip being played
+        self._worker = None
+
+    def _get_engine(self):
+        # Playback worker only
+        if self.engine is None:
+            import pyttsx3
+
+            engine = pyttsx3.init()
+            engine.setProperty("rate", 165)
+            engine.setProperty("volume", 0.9)
+            self.engine = engine
+        return self.engine
+
+    def _tmp_path(self, suffix):
+        return os.path.join(self._tmp_dir, f"{next(self._tmp_seq)}{suffix}")
+
+    def _render(self, text):
+        """Synthesizes `text` into (audio bytes, format)."""
+        if self.mode == "offline":
+            path = self._tmp_path(".wav")
+            try:
+                engine = self._get_engine()
+                engine.save_to_file(text, path)
+                engine.runAndWait()
+                with open(path, "rb") as f:
+                    data = f.read()
+            finally:
+                if os.path.exists(path):
+                    os.remove(path)
+            # Some pyttsx3 drivers write AIFF; only WAV is played from memory
+            self._renders_wav = data[:4] == b"RIFF"
+            return data, "wav" if self._renders_wav else None
+
+        from gtts import gTTS
+
+        buf = io.BytesIO()
+        gTTS(text).write_to_fp(buf)
+        return buf.getvalue(), "mp3"
+
+    def _clip(self, text):
+        if self._renders_wav is False:
+            # Rendering would only be thrown away; _play speaks directly
+            return None, None
+        key = self.cache.key(self.mode, text)
+        clip = self.cache.get(key)
+        if clip is None:
+            clip = self._render(text)
+            if clip[1] is not None:
+                self.cache.put(key, clip)
+        return clip
+
+    def _play_wav(self, data):
+        import pyaudio
 
-    def speak(self, text: str):
+        if self._pyaudio is None:
+            self._pyaudio = pyaudio.PyAudio()
+        with wave.open(io.BytesIO(data), "rb") as wf:
+            stream = self._pyaudio.open(
+                format=self._pyaudio.get_format_from_width(wf.getsampwidth()),
+                channels=wf.getnchannels(),
+                rate=wf.getframerate(),
+                output=True
+            )
+            try:
+                chunk = wf.readframes(1024)
+                while chunk and not self._interrupt.is_set():
+                    stream.write(chunk)
+                    chunk = wf.readframes(1024)
+            finally:
+                stream.stop_stream()
+                stream.close()
+
+    def _play_mp3(self, data):
+        from playsound3 import playsound
+
+        # playsound needs a file; use a unique path inside this process's dir
+        path = self._tmp_path(".mp3")
+        try:
+            with open(path, "wb") as f:
+                f.write(data)
+            sound = playsound(path, block=False)
+            while sound.is_alive():
+                if self._interrupt.wait(0.05):
+                    sound.stop()
+                    break
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def warm(self, phrases, background=True):
+        """
+        Queues fixed phrases for pre-rendering into the cache, one per
+        playback-queue item so prompts can still play in between. Returns
+        a Future resolved once all are done, or waits for it when
+        `background` is False.
+        """
+        texts = [t for t in dict.fromkeys(phrases) if self.cache.key(self.mode, t) not in self.cache]
+        batch = {"left": len(texts), "stopped": False, "future": Future()}
+        if not texts:
+            batch["future"].set_result(True)
+        else:
+            self._ensure_worker()
+            for text in texts:
+                item = {"text": text, "future": None, "stale": False, "key": None, "warm": batch}
+                self._queue.put((WARM, next(self._order), item))
+        if not background:
+            batch["future"].result()
+            return None
+        return batch["future"]
+
+    def _warm_one(self, item):
+        batch = item["warm"]
+        if not batch["stopped"]:
+            try:
+                _, fmt = self._clip(item["text"])
+                # Driver cannot render WAV: nothing worth caching
+                batch["stopped"] = fmt is None
+            except Exception as e:
+                print(f"⚠️ TTS warm-up skipped {item['text']!r}: {e}")
+                batch["stopped"] = True
+        batch["left"] -= 1
+        if batch["left"] == 0:
+            batch["future"].set_result(not batch["stopped"])
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._playback_loop, name="tts-playback", daemon=True)
+            self._worker.start()
+
+    def say(self, text: str, priority=ROUTINE, coalesce_key=None):
+        """
+        Queues `text` for playback and returns a Future without blocking.
+        """
+        future = Future()
+        item = {"text": text, "future": future, "stale": False, "key": coalesce_key, "warm": None}
+
+        if coalesce_key is not None:
+            with self._pending_lock:
+                previous = self._pending.get(coalesce_key)
+                if previous is not None:
+                    previous["stale"] = True
+                self._pending[coalesce_key] = item
+
+        print(f"🔊 AEGIS: {text}")
+        self._ensure_worker()
+        self._queue.put((priority, next(self._order), item))
+
+        if self._playing is not None and priority < self._playing:
+            # Critical alerts cut the current routine prompt short
+            self._interrupt.set()
+        return future
+
+    def speak(self, text: str, priority=ROUTINE):
         """
-        Converts text to speech and plays audio.
+        Converts text to speech and plays audio, blocking until done.
 
         Args:
             text: String to be spoken
         """
-        print(f"🔊 AEGIS: {text}")
+        return self.say(text, priority=priority).result()
 
-        try:
-            if self.mode == "offline":
-                self.engine.say(text)
-                self.engine.runAndWait()
-            else:
-                tts = gTTS(text)
-                file = "aegis_tts.mp3"
-                tts.save(file)
-                playsound(file)
-                # Clean up temp file
-                if os.path.exists(file):
-                    os.remove(file)
-        except Exception as e:
-
-            print(f"⚠️ TTS Error: {e}")
+    @property
+    def playing(self):
+        """True while a clip is being played (used for ASR echo gating)."""
+        return self._playing is not None
+
+    def interrupt(self):
+        """Barge-in: stop the clip that is playing right now."""
+        if self._playing is not None:
+            self._interrupt.set()
+
+    def wait_idle(self, timeout=None):
+        """Blocks until everything queued so far has been played."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._queue.empty() or self._playing is not None:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.02)
+        return True
+
+    def _playback_loop(self):
+        while True:
+            priority, _, item = self._queue.get()
+            if item["key"] is not None:
+                with self._pending_lock:
+                    if self._pending.get(item["key"]) is item:
+                        del self._pending[item["key"]]
+            if item["stale"]:
+                item["future"].set_result(False)
+                continue
+            if item["warm"] is not None:
+                self._warm_one(item)
+                continue
+
+            self._interrupt.clear()
+            self._playing = priority
+            try:
+                self._play(item["text"])
+                item["future"].set_result(not self._interrupt.is_set())
+            except Exception as e:
+                print(f"⚠️ TTS Error: {e}")
+                item["future"].set_result(False)
+            finally:
+                self._playing = None
+
+    def _play(self, text):
+        data, fmt = self._clip(text)
+        if fmt == "wav":
+            self._play_wav(data)
+        elif fmt == "mp3":
+            self._play_mp3(data)
+        else:
+            engine = self._get_engine()
+            engine.say(text)
+            engine.runAndWait()
+
+    def close(self):
+        if self._pyaudio is not None:
+            self._pyaudio.terminate()
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
@@ -0,0 +1,78 @@
+# benchmarks/bench_asr.py
+"""
+Per-utterance ASR latency, fed deterministically from a WAV file.
+
+    python benchmarks/bench_asr.py --wav completed.wav --model models/vosk-model-small-en-us-0.15
+    python benchmarks/bench_asr.py --wav completed.wav --backend google
+
+The vosk backend needs the optional `vosk` package and a downloaded model.
+
+The WAV must be 16-bit mono, at any sample rate (the recognizer is built
+for the file's rate). Audio is replayed as fast as possible unless
+--realtime is given, in which case chunks arrive at capture pace and the
+latencies show what a medic would actually wait.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import wave
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agents.asr_backends import COMMAND_WORDS, GoogleBackend, VoskBackend, WavFileSource
+
+
+def run_once(backend, source):
+    start = time.perf_counter()
+    first_partial = None
+    text = ""
+    for hypothesis in backend.stream(source.chunks(), stop_words=COMMAND_WORDS, sample_rate=source.sample_rate):
+        if first_partial is None:
+            first_partial = time.perf_counter() - start
+        if hypothesis.final:
+            text = hypothesis.text
+            break
+    return first_partial, time.perf_counter() - start, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wav", required=True)
+    parser.add_argument("--backend", choices=["vosk", "google"], default="vosk")
+    parser.add_argument("--model", help="Vosk model directory (vosk backend)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--chunk-ms", type=int, default=100)
+    parser.add_argument("--realtime", action="store_true")
+    args = parser.parse_args()
+
+    if args.backend == "vosk":
+        if not args.model:
+            parser.error("--model is required for the vosk backend")
+        backend = VoskBackend(args.model)
+    else:
+        backend = GoogleBackend()
+
+    source = WavFileSource(args.wav, chunk_ms=args.chunk_ms, realtime=args.realtime)
+    with wave.open(args.wav, "rb") as wf:
+        audio_s = wf.getnframes() / wf.getframerate()
+
+    first_partials, totals = [], []
+    for _ in range(args.runs):
+        first_partial, total, text = run_once(backend, source)
+        totals.append(total)
+        if first_partial is not None:
+            first_partials.append(first_partial)
+
+    print(f"backend:        {args.backend}")
+    print(f"audio:          {audio_s:.2f}s ({'realtime' if args.realtime else 'as fast as possible'})")
+    print(f"transcript:     {text!r}")
+    if first_partials:
+        print(f"first partial:  {statistics.median(first_partials) * 1000:.1f} ms (median)")
+    print(f"final result:   {statistics.median(totals) * 1000:.1f} ms (median of {args.runs})")
+    print(f"real-time factor: {statistics.median(totals) / audio_s:.3f}")
+
+
+if __name__ == "__main__":
+    main()
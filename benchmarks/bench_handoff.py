@@ -0,0 +1,169 @@
+# benchmarks/bench_handoff.py
+"""
+Load generator for a running hospital_sim (`python hospital_sim.py --workers 4`).
+
+`--processes` client processes each run `--concurrency` threads. Every
+session is one AEGIS-shaped pre-alert (report, severity, trend,
+specialists and ward from the real agents, over synthetic vitals)
+followed by `--updates` updates under the case id the hospital returned,
+all through HospitalOpenAPIClient like AEGIS itself. Client histograms
+are merged across processes, so percentiles cover every request.
+
+Reports requests per second, latency percentiles, errors/retries and
+duplicate case ids; `--out` writes the result as JSON.
+
+    python benchmarks/bench_handoff.py --sessions 2000 --processes 4 --concurrency 8
+"""
+import argparse
+import collections
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agents.context_compactor import ContextCompactor
+from agents.multi_speciality import MultiSpecialityCoordinator
+from agents.severity_estimator import SeverityEstimator
+from bench_pipeline import CASES, synthetic_vitals
+from core.observability import Histogram, Metrics
+from core.vitals_buffer import VitalsBuffer
+from oracle.gemini_oracle_stub import GeminiOracle
+from tools.openapi_client import HospitalOpenAPIClient
+
+
+def build_payloads(rng, n, readings=60):
+    """`n` pre-alert payloads as AEGIS would send them, over varied vitals."""
+    severity = SeverityEstimator()
+    specialty = MultiSpecialityCoordinator()
+    oracle = GeminiOracle()
+    payloads = []
+    for i in range(n):
+        report, start, drift = rng.choice(CASES)
+        buffer = VitalsBuffer(capacity=readings)
+        for reading in synthetic_vitals(rng, start, drift, readings, 1.0, 1_700_000_000.0 + i * 3600):
+            buffer.append(reading, ts=reading["ts"])
+        current = buffer[-1]
+        score = severity.estimate(current)
+        trend = ContextCompactor().summarize(buffer)
+        specialists = specialty.assign_specialists(report, current)
+        oracle_out = oracle.analyze(report, current, score, trend, specialists)
+        payloads.append({**oracle_out, "injury_description": report})
+    return payloads
+
+
+def run_client(url, payloads, sessions, concurrency, updates):
+    """
+    One client process: `sessions` pre-alert + update sequences spread
+    over `concurrency` threads. Returns the merged histogram, counters
+    and the case ids the hospital assigned.
+    """
+    metrics = Metrics()
+    case_ids = []
+    ids_lock = threading.Lock()
+    todo = iter(range(sessions))
+    todo_lock = threading.Lock()
+
+    def worker():
+        client = HospitalOpenAPIClient(url, pool_size=1, metrics=metrics)
+        try:
+            while True:
+                with todo_lock:
+                    n = next(todo, None)
+                if n is None:
+                    return
+                payload = payloads[n % len(payloads)]
+                response = client.handoff({**payload, "stage": "pre_alert"})
+                case_id = response.get("case_id")
+                if case_id is None:
+                    continue
+                with ids_lock:
+                    case_ids.append(case_id)
+                for _ in range(updates):
+                    client.handoff({**payload, "stage": "update", "case_id": case_id})
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {
+        "histogram": metrics.histograms.get("hospital.handoff") or Histogram(),
+        "counters": dict(metrics.counters),
+        "case_ids": case_ids
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5001")
+    parser.add_argument("--sessions", type=int, default=1000, help="pre-alerts in total")
+    parser.add_argument("--updates", type=int, default=2, help="updates sent per pre-alert")
+    parser.add_argument("--processes", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--concurrency", type=int, default=8, help="client threads per process")
+    parser.add_argument("--payloads", type=int, default=64, help="distinct payloads to cycle through")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", help="write the result as JSON")
+    args = parser.parse_args()
+
+    payloads = build_payloads(random.Random(args.seed), args.payloads)
+    shares = [args.sessions // args.processes + (i < args.sessions % args.processes)
+              for i in range(args.processes)]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.processes) as pool:
+        futures = [pool.submit(run_client, args.url, payloads, share, args.concurrency, args.updates)
+                   for share in shares if share]
+        parts = [f.result() for f in futures]
+    wall_s = time.perf_counter() - start
+
+    hist = Histogram()
+    counters = collections.Counter()
+    case_ids = []
+    for part in parts:
+        hist.merge(part["histogram"])
+        counters.update(part["counters"])
+        case_ids += part["case_ids"]
+    duplicates = len(case_ids) - len(set(case_ids))
+    snap = hist.snapshot()
+    errors = counters.get("hospital.handoff.errors", 0)
+
+    result = {
+        "benchmark": "handoff",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "requests": hist.count,
+        "errors": errors,
+        "retries": counters.get("hospital.handoff.retries", 0),
+        "cases": len(case_ids),
+        "duplicate_case_ids": duplicates,
+        "wall_s": wall_s,
+        "requests_per_s": hist.count / wall_s if wall_s > 0 else 0.0,
+        "latency_ms": {k: v * 1000 for k, v in snap.items() if k != "count"}
+    }
+
+    print(f"requests:    {result['requests']:,} in {wall_s:.2f}s ({result['requests_per_s']:,.0f} req/s, "
+          f"{args.processes}x{args.concurrency} clients)")
+    print(f"errors:      {errors} ({result['retries']} retries)")
+    print(f"cases:       {len(case_ids):,} ({duplicates} duplicate ids)")
+    if snap["count"]:
+        lat = result["latency_ms"]
+        print(f"latency ms:  p50 {lat['p50']:.2f} | p90 {lat['p90']:.2f} | p99 {lat['p99']:.2f} | max {lat['max']:.2f}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nresults:     {args.out}")
+    return 1 if errors or duplicates else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+# benchmarks/bench_oracle_cache.py
+"""
+CachedOracle against a LocalOracle with configurable latency.
+
+Three scenarios: a repeated workload of noisy vitals (hit rate and
+wall time vs. calling the oracle directly), a burst of identical
+concurrent requests (single-flight), and a slow refresh of an expired
+entry (stale result served on timeout).
+
+    python benchmarks/bench_oracle_cache.py --latency 0.2 --requests 400
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from oracle.cached_oracle import CachedOracle
+from oracle.gemini_oracle_stub import LocalOracle
+
+CASES = [
+    ("Male, 35, fell 20 feet from scaffolding. Visible chest deformity.", 9,
+     ["Cardiothoracic Surgeon", "Trauma Surgeon", "Emergency Physician", "Anesthesiologist"]),
+    ("Female, 28, house fire. Second degree burns on arms.", 7,
+     ["Burns Specialist", "Emergency Physician", "Anesthesiologist"]),
+    ("Motorcycle collision, open leg fracture, heavy bleeding.", 8,
+     ["Orthopedic Surgeon", "Emergency Physician", "Anesthesiologist"]),
+    ("Elderly male, head injury after fall, decreased consciousness.", 8,
+     ["Neurosurgeon", "Trauma Surgeon", "Emergency Physician", "Anesthesiologist"]),
+]
+TREND = {"bp_trend": "falling", "hr_trend": "rising", "spo2_trend": "stable"}
+
+
+def workload(n, rng):
+    requests = []
+    for _ in range(n):
+        report, severity, specialists = rng.choice(CASES)
+        # Monitor noise that stays inside one vitals bucket
+        vitals = {"hr": 140 + rng.randint(0, 9), "bp_systolic": 80 + rng.randint(0, 9), "spo2": 88 + rng.randint(0, 1)}
+        trend = {**TREND, "hr_slope": rng.uniform(0, 2)}
+        requests.append((report, vitals, severity, trend, specialists))
+    return requests
+
+
+def run(oracle, requests, concurrency):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda args: oracle.analyze(*args), requests))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    requests = workload(args.requests, rng)
+
+    direct = LocalOracle(args.latency, args.jitter, seed=args.seed)
+    direct_s = run(direct, requests, args.concurrency)
+
+    backend = LocalOracle(args.latency, args.jitter, seed=args.seed)
+    cached = CachedOracle(backend, max_workers=args.concurrency)
+    cached_s = run(cached, requests, args.concurrency)
+    stats = cached.stats()
+
+    print(f"workload:     {args.requests} requests over {len(CASES)} cases, {args.concurrency} threads")
+    print(f"direct:       {direct_s:.2f}s  ({direct.calls} oracle calls)")
+    print(f"cached:       {cached_s:.2f}s  ({backend.calls} oracle calls, {stats['hit_rate']:.0%} hit rate, "
+          f"{stats.get('oracle.cache.shared', 0)} shared in-flight)")
+    latency = cached.metrics.histogram("oracle.analyze")
+    print(f"analyze:      p50 {latency['p50'] * 1000:.3f} ms, p99 {latency['p99'] * 1000:.1f} ms, "
+          f"max {latency['max'] * 1000:.1f} ms")
+
+    # Single-flight: a burst of identical requests reaches the oracle once
+    backend = LocalOracle(args.latency)
+    cached = CachedOracle(backend, max_workers=args.concurrency)
+    burst = [requests[0]] * args.concurrency
+    burst_s = run(cached, burst, args.concurrency)
+    print(f"burst:        {len(burst)} identical concurrent requests -> {backend.calls} oracle call in {burst_s:.2f}s")
+
+    # Stale on timeout: the entry has expired and the refresh is slow
+    backend = LocalOracle(args.latency)
+    cached = CachedOracle(backend, ttl=0.0, timeout=args.latency / 10)
+    cached.analyze(*requests[0])
+    start = time.perf_counter()
+    cached.analyze(*requests[0])
+    stale_s = time.perf_counter() - start
+    print(f"stale:        expired entry served in {stale_s * 1000:.1f} ms "
+          f"(oracle latency {args.latency * 1000:.0f} ms, {cached.stats().get('oracle.cache.stale', 0)} stale)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+# benchmarks/bench_pipeline.py
+"""
+Headless end-to-end benchmark of AEGIS.analyze_patient.
+
+Each session streams synthetic vitals into a fresh patient, then runs the
+whole pipeline (severity, trend, keywords, specialists, protocol, oracle,
+hospital pre-alert/updates, ETA) with scripted ASR transcripts, a silent
+TTS sink and an in-process hospital_sim. Scripts and vitals come from
+`--seed`, so every run makes the same decisions and only timings differ.
+
+Reports per-stage latency percentiles (the agent.* / pipeline.*
+histograms AEGIS records), sessions per second and peak RSS, and writes
+them to `--out` as JSON. `--compare` prints the change against an
+earlier result file; with `--max-regression` the exit status is 1 when
+throughput or a stage's p50 got worse by more than that percentage.
+
+`--jitter` shifts each vitals timestamp by up to that many milliseconds,
+as a real monitor clock would. `--check-replay` then replays the recorded
+sessions through aegis_replay with unchanged rules; any changed decision
+means the recording lost something, and the exit status is 1.
+
+    python benchmarks/bench_pipeline.py --sessions 200 --out base.json
+    python benchmarks/bench_pipeline.py --sessions 200 --compare base.json --max-regression 20
+    python benchmarks/bench_pipeline.py --sessions 30 --jitter 2 --check-replay
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from aegis_main import AEGIS
+from aegis_replay import ReplayEngine, load_recordings
+from hospital_sim import HandoffLog
+from oracle.gemini_oracle_stub import LocalOracle
+from tools.headless import InProcessHospital, ScriptedASR, SilentTTS
+
+# report, starting vitals, per-reading drift
+CASES = [
+    ("Male, 35 years old, fell 20 feet from scaffolding. Visible chest deformity, paradoxical breathing.",
+     {"hr": 118, "bp_systolic": 98, "spo2": 93}, {"hr": 0.25, "bp_systolic": -0.2, "spo2": -0.05}),
+    ("Female, 52, head injury after car crash, decreased consciousness, unequal pupils.",
+     {"hr": 96, "bp_systolic": 150, "spo2": 96}, {"hr": -0.1, "bp_systolic": 0.2, "spo2": -0.02}),
+    ("Industrial fire, second degree burns to both arms and torso, hoarse voice.",
+     {"hr": 124, "bp_systolic": 104, "spo2": 95}, {"hr": 0.1, "bp_systolic": -0.1, "spo2": -0.03}),
+    ("Motorcycle collision, open leg fracture, heavy bleeding from the thigh.",
+     {"hr": 132, "bp_systolic": 88, "spo2": 94}, {"hr": 0.3, "bp_systolic": -0.3, "spo2": -0.04}),
+    ("Elderly male, fall at home, confused, small laceration on the forearm.",
+     {"hr": 84, "bp_systolic": 132, "spo2": 97}, {"hr": 0.0, "bp_systolic": 0.0, "spo2": 0.0}),
+]
+FAILURE_DETAILS = [
+    "Could not get a seal, patient keeps moving.",
+    "Bleeding continues through the dressing.",
+    "Equipment not available in this unit.",
+]
+
+
+def synthetic_vitals(rng, start, drift, n, rate_hz, t0, jitter=0.0):
+    """`n` readings drifting from `start`, with monitor noise, at `rate_hz` (± `jitter` s)."""
+    readings = []
+    for i in range(n):
+        reading = {
+            key: int(round(value + drift[key] * i + rng.gauss(0, 2 if key != "spo2" else 0.5)))
+            for key, value in start.items()
+        }
+        reading["spo2"] = min(100, reading["spo2"])
+        reading["ts"] = t0 + i / rate_hz + (rng.uniform(-jitter, jitter) if jitter else 0.0)
+        reading["source"] = "synthetic"
+        readings.append(reading)
+    return readings
+
+
+def medic_script(rng, steps, fail_rate):
+    """What the medic says: one answer per protocol step, then the ETA."""
+    lines = []
+    for _ in range(steps):
+        if rng.random() < fail_rate:
+            lines += ["failed", rng.choice(FAILURE_DETAILS)]
+        else:
+            lines.append(rng.choice(["completed", "done", "yes, completed"]))
+    lines.append(f"about {rng.randint(5, 30)} minutes out")
+    return lines
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes elsewhere
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def stage_table(histograms):
+    """Histogram snapshots (seconds) as per-stage milliseconds."""
+    stages = {}
+    for key, snap in sorted(histograms.items()):
+        if not snap.get("count"):
+            continue
+        stages[key] = {"count": snap["count"]}
+        for field in ("mean", "min", "p50", "p90", "p99", "max"):
+            stages[key][f"{field}_ms"] = snap[field] * 1000
+    return stages
+
+
+def run_sessions(aegis, asr, args, rng):
+    t0 = 1_700_000_000.0  # fixed epoch keeps memory bank throttling identical between runs
+    readings = 0
+    start = time.perf_counter()
+    for n in range(args.sessions):
+        report, vitals, drift = rng.choice(CASES)
+        stream = synthetic_vitals(rng, vitals, drift, args.readings, args.rate, t0 + n * 3600, args.jitter / 1000)
+        steps = len(aegis.guidance.get_protocol(aegis.guidance.select_protocol(report)).steps)
+        asr.script(medic_script(rng, steps, args.fail_rate))
+
+        with aegis.metrics.timer("bench.session"):
+            aegis.new_session()
+            with aegis.metrics.timer("bench.ingest"):
+                for reading in stream:
+                    aegis._on_vitals(reading)
+            aegis.analyze_patient(report)
+        readings += len(stream)
+    return time.perf_counter() - start, readings
+
+
+def compare(result, baseline, max_regression):
+    """Prints deltas against `baseline`; returns the regressions over the limit."""
+    def delta(new, old):
+        return (new - old) / old * 100 if old else 0.0
+
+    regressions = []
+    print(f"\nvs. {baseline.get('time', 'baseline')}")
+    change = delta(result["sessions_per_s"], baseline["sessions_per_s"])
+    print(f"  sessions/s            {baseline['sessions_per_s']:10.1f} -> {result['sessions_per_s']:10.1f}  ({change:+.1f}%)")
+    if max_regression is not None and -change > max_regression:
+        regressions.append("sessions_per_s")
+
+    for key, stage in result["stages"].items():
+        old = baseline.get("stages", {}).get(key)
+        if not old:
+            continue
+        p50 = delta(stage["p50_ms"], old["p50_ms"])
+        p99 = delta(stage["p99_ms"], old["p99_ms"])
+        print(f"  {key:<28} p50 {old['p50_ms']:9.3f} -> {stage['p50_ms']:9.3f} ms ({p50:+6.1f}%)  "
+              f"p99 {old['p99_ms']:9.3f} -> {stage['p99_ms']:9.3f} ms ({p99:+6.1f}%)")
+        if max_regression is not None and p50 > max_regression:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--readings", type=int, default=120, help="vitals readings streamed per session")
+    parser.add_argument("--rate", type=float, default=1.0, help="synthetic vitals rate (Hz) for timestamps")
+    parser.add_argument("--jitter", type=float, default=0.0, help="vitals timestamp jitter (± ms)")
+    parser.add_argument("--fail-rate", type=float, default=0.2, help="chance the medic reports a step failed")
+    parser.add_argument("--oracle-latency", type=float, default=0.0, help="seconds per oracle call")
+    parser.add_argument("--hospital-latency", type=float, default=0.0, help="seconds per hospital handoff")
+    parser.add_argument("--hospital-log", choices=("none", "sync", "batch", "off"), default="none",
+                        help="also persist hospital responses with this durability")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default="bench_pipeline.json")
+    parser.add_argument("--compare", help="earlier result file to diff against")
+    parser.add_argument("--max-regression", type=float, help="fail if worse than this many percent")
+    parser.add_argument("--check-replay", action="store_true",
+                        help="replay the recorded sessions and fail on any changed decision")
+    parser.add_argument("--verbose", action="store_true", help="keep the console output of AEGIS")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory(prefix="aegis_bench_") as data_dir:
+        log = None
+        if args.hospital_log != "none":
+            log = HandoffLog(os.path.join(data_dir, "hospital_logs.json"), durability=args.hospital_log)
+        asr = ScriptedASR()
+        aegis = AEGIS(
+            asr=asr,
+            tts=SilentTTS(),
+            oracle=LocalOracle(args.oracle_latency, seed=args.seed),
+            hospital_client=InProcessHospital(latency=args.hospital_latency, log=log),
+            data_dir=data_dir,
+            watch_protocols=False
+        )
+        aegis.hospital_client.metrics = aegis.metrics
+        aegis.step_pause = 0
+
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+            wall_s, readings = run_sessions(aegis, asr, args, rng)
+            aegis.close()
+            if log is not None:
+                log.close()
+            replay = None
+            if args.check_replay:
+                recordings = load_recordings(os.path.join(data_dir, "memory_bank.json"),
+                                             os.path.join(data_dir, "a2a_logs.jsonl"))
+                replay = ReplayEngine(workers=1).run(recordings)
+
+    exported = aegis.metrics.export()
+    result = {
+        "benchmark": "pipeline",
+        "time": exported["time"],
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "sessions": args.sessions,
+        "wall_s": wall_s,
+        "sessions_per_s": args.sessions / wall_s,
+        "readings_per_s": readings / wall_s,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": stage_table(exported["histograms"]),
+        "counters": exported["counters"],
+        "oracle_cache": aegis.oracle.stats(),
+        "tts_prompts": aegis.tts.count
+    }
+    if replay is not None:
+        result["replay"] = {key: replay[key] for key in ("replays", "changed", "unchanged", "skipped", "fields")}
+
+    print(f"sessions:    {args.sessions} in {wall_s:.2f}s  ({result['sessions_per_s']:.1f} sessions/s, "
+          f"{result['readings_per_s']:,.0f} vitals/s)")
+    rss = result["peak_rss_mb"]
+    print(f"peak RSS:    {rss:.1f} MB" if rss is not None else "peak RSS:    n/a")
+    print(f"oracle:      {result['oracle_cache']['hit_rate']:.0%} cache hit rate")
+    print(f"{'stage':<28} {'count':>7} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for key, stage in result["stages"].items():
+        print(f"{key:<28} {stage['count']:>7} {stage['p50_ms']:>10.3f} {stage['p90_ms']:>10.3f} "
+              f"{stage['p99_ms']:>10.3f} {stage['max_ms']:>10.3f}")
+
+    if replay is not None:
+        fields = ", ".join(f"{k} ({v})" for k, v in sorted(replay["fields"].items()))
+        print(f"replay:      {replay['unchanged']} unchanged, {replay['changed']} changed, "
+              f"{replay['skipped']} skipped" + (f"; changed fields: {fields}" if fields else ""))
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, "r") as f:
+            regressions = compare(result, json.load(f), args.max_regression)
+
+    with open(args.out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nresults:     {args.out}")
+
+    if regressions:
+        print(f"regressed by more than {args.max_regression:g}%: {', '.join(regressions)}")
+        return 1
+    if replay is not None and (replay["changed"] or replay["skipped"]):
+        print("replay: recorded sessions no longer reproduce their decisions")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+# benchmarks/bench_sessions.py
+"""
+Legacy list-backed session store vs. InMemorySessionService.
+
+A long transport's worth of events (mostly vitals, a few reports and
+hospital responses) is added to both stores. Both then answer the
+queries AEGIS and the dashboard make: every report, the last minute of
+vitals and the full history. Reported: add throughput, query time and
+memory held (tracemalloc).
+
+The vitals ring only answers within the window it retains (`--capacity`
+readings, 14.4 s at 250 Hz with the default). When that is less than a
+minute, both stores are asked for that shorter window instead, so the
+two queries always return the same events.
+
+    python benchmarks/bench_sessions.py --events 1000000 --rate 250
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.sessions import InMemorySessionService
+
+
+class LegacySessionService:
+    """The unbounded list store InMemorySessionService replaced."""
+
+    def __init__(self):
+        self.session = []
+
+    def add_event(self, event_type, payload):
+        entry = {
+            "type": event_type,
+            "payload": payload,
+            "ts": datetime.now(timezone.utc).isoformat()
+        }
+        self.session.append(entry)
+        return entry
+
+    def get_history(self):
+        return self.session[:]
+
+
+def workload(n):
+    vitals = {"hr": 120, "bp_systolic": 95, "spo2": 94}
+    for i in range(n):
+        if i % 1000 == 0:
+            yield "paramedic_report", "Male, 35, fell from scaffolding, chest deformity."
+        elif i % 1000 == 500:
+            yield "hospital_response", {"status": "CONFIRMED", "assigned_ward": "ICU"}
+        else:
+            yield "vitals", vitals
+
+
+def measure(factory, events):
+    """Add throughput on one store, memory held on a second (tracemalloc slows adds)."""
+    store = factory()
+    start = time.perf_counter()
+    for event_type, payload in events:
+        store.add_event(event_type, payload)
+    add_s = time.perf_counter() - start
+
+    tracemalloc.start()
+    other = factory()
+    for event_type, payload in events:
+        other.add_event(event_type, payload)
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return store, add_s, held
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--rate", type=float, default=250.0, help="vitals rate, for the last-minute query")
+    parser.add_argument("--capacity", type=int, default=3600, help="vitals ring size")
+    args = parser.parse_args()
+
+    events = list(workload(args.events))
+    window = min(int(60 * args.rate), args.capacity)
+    window_s = window / args.rate
+
+    legacy, legacy_add, legacy_mem = measure(LegacySessionService, events)
+    start = time.perf_counter()
+    reports = [e for e in legacy.get_history() if e["type"] == "paramedic_report"]
+    legacy_reports = time.perf_counter() - start
+    start = time.perf_counter()
+    recent = [e for e in legacy.get_history() if e["type"] == "vitals"][-window:]
+    legacy_recent = time.perf_counter() - start
+
+    # Spill target that discards, so only the store itself is measured
+    store, store_add, store_mem = measure(
+        lambda: InMemorySessionService(capacities={"vitals": args.capacity}, spill=lambda t, p: None), events
+    )
+    spilled = sum(s["spilled"] for s in store.stats().values())
+    start = time.perf_counter()
+    indexed_reports = list(store.events("paramedic_report"))
+    store_reports = time.perf_counter() - start
+    start = time.perf_counter()
+    # Events were added within moments, not at `rate`: trim to the same count
+    indexed_recent = list(store.recent("vitals", seconds=window_s))[-window:]
+    store_recent = time.perf_counter() - start
+
+    print(f"events:      {args.events:,} ({len(reports)} reports)")
+    print(f"add:         legacy {args.events / legacy_add:,.0f}/s | indexed {args.events / store_add:,.0f}/s")
+    print(f"memory:      legacy {legacy_mem / 2 ** 20:.1f} MB | indexed {store_mem / 2 ** 20:.1f} MB "
+          f"({store.count():,} held, {spilled:,} spilled)")
+    print(f"reports:     legacy {legacy_reports * 1000:.2f} ms | indexed {store_reports * 1000:.3f} ms "
+          f"({len(indexed_reports)} held)")
+    label = "last minute:" if window_s >= 60 else f"last {window_s:g}s:"
+    print(f"{label:<12} legacy {legacy_recent * 1000:.2f} ms ({len(recent)}) | "
+          f"indexed {store_recent * 1000:.3f} ms ({len(indexed_recent)})"
+          + ("" if window_s >= 60 else f", the ring's whole window at {args.rate:g} Hz"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+# benchmarks/bench_severity.py
+"""
+Scalar vs. batch SeverityEstimator throughput.
+
+    python benchmarks/bench_severity.py --n 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agents.severity_estimator import SeverityEstimator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    hr = rng.integers(40, 190, args.n).astype(np.float64)
+    bp = rng.integers(0, 180, args.n).astype(np.float64)
+    spo2 = rng.integers(70, 101, args.n).astype(np.float64)
+
+    estimator = SeverityEstimator()
+
+    rows = [{"hr": h, "bp_systolic": b, "spo2": s} for h, b, s in zip(hr.tolist(), bp.tolist(), spo2.tolist())]
+    start = time.perf_counter()
+    scalar = [estimator.estimate(v) for v in rows]
+    scalar_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = estimator.estimate_batch(hr, bp, spo2)
+    batch_s = time.perf_counter() - start
+
+    mismatches = int(np.count_nonzero(batch != np.asarray(scalar)))
+
+    print(f"readings:   {args.n}")
+    print(f"scalar:     {scalar_s:.3f}s  ({args.n / scalar_s:,.0f} readings/s)")
+    print(f"batch:      {batch_s:.3f}s  ({args.n / batch_s:,.0f} readings/s)")
+    print(f"speedup:    {scalar_s / batch_s:.1f}x")
+    print(f"mismatches: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
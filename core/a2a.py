@@ -1,9 +1,19 @@
 # core/a2a.py
+import asyncio
+import atexit
 import json, os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
 
-A2A_LOG_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'a2a_logs.json'))
+A2A_LOG_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'a2a_logs.jsonl'))
+LEGACY_A2A_LOG_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'a2a_logs.json'))
+
+# Per-target timeout of send_many(), also for targets a deadline dict leaves out
+DEFAULT_DEADLINE = 5.0
 
 
 @dataclass
@@ -23,9 +33,167 @@ class A2AMessage:
         }
 
 
+class A2ALogWriter:
+    """
+    Background, group-committing writer for the A2A message log.
+
+    `log()` only enqueues; a dedicated thread drains the bounded queue and
+    appends one JSON line per entry, committing a batch once it holds
+    `batch_size` entries or `batch_window` seconds have passed. When the
+    queue is full, `log()` waits up to `block_timeout` (counted as delayed)
+    and then drops the entry (counted as dropped).
+    """
+
+    def __init__(self, path=A2A_LOG_PATH, max_queue=1024, batch_size=64,
+                 batch_window=0.05, block_timeout=0.01):
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.block_timeout = block_timeout
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stats_lock = threading.Lock()
+        self._stats = {"enqueued": 0, "written": 0, "batches": 0, "delayed": 0, "dropped": 0, "errors": 0}
+        self._closed = False
+        # Held across the closed check and the put, so nothing is queued behind the sentinel
+        self._close_lock = threading.Lock()
+
+        self._thread = threading.Thread(target=self._run, name="a2a-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _bump(self, key, n=1):
+        with self._stats_lock:
+            self._stats[key] += n
+
+    def log(self, entry):
+        with self._close_lock:
+            if self._closed:
+                self._bump("dropped")
+                return False
+
+            try:
+                self._queue.put_nowait(entry)
+            except queue.Full:
+                try:
+                    self._queue.put(entry, timeout=self.block_timeout)
+                except queue.Full:
+                    self._bump("dropped")
+                    return False
+                self._bump("delayed")
+
+        self._bump("enqueued")
+        return True
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                self._queue.task_done()
+                return
+
+            batch = [entry]
+            deadline = time.monotonic() + self.batch_window
+            stop = False
+
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stop = True
+                    break
+                batch.append(entry)
+
+            self._commit(batch)
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _commit(self, batch):
+        lines = "".join(json.dumps(entry, default=str) + "\n" for entry in batch)
+        try:
+            with open(self.path, "a") as f:
+                f.write(lines)
+            self._bump("written", len(batch))
+            self._bump("batches")
+        except Exception:
+            self._bump("errors", len(batch))
+
+    def flush(self):
+        """Blocks until every entry enqueued so far has been written."""
+        self._queue.join()
+
+    def close(self):
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+
+    def stats(self):
+        with self._stats_lock:
+            out = dict(self._stats)
+        out["queued"] = self._queue.qsize()
+        return out
+
+
+def iter_a2a_log(path=A2A_LOG_PATH):
+    """Yields logged A2A entries in write order, skipping a torn last line."""
+    try:
+        f = open(path, "r")
+    except OSError:
+        return
+    with f:
+        for line in f:
+            if line.endswith("\n"):
+                yield json.loads(line)
+
+
+def migrate_legacy_log(legacy_path=LEGACY_A2A_LOG_PATH, path=A2A_LOG_PATH):
+    """One-shot conversion of the old a2a_logs.json array into the line log."""
+    if not os.path.exists(legacy_path):
+        return 0
+    try:
+        with open(legacy_path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = []
+
+    with open(path, "a") as f:
+        for entry in data if isinstance(data, list) else []:
+            f.write(json.dumps(entry, default=str) + "\n")
+
+    os.replace(legacy_path, legacy_path + ".migrated")
+    return len(data)
+
+
+_default_writer = None
+_default_writer_lock = threading.Lock()
+
+
+def default_log_writer():
+    """Process-wide writer for A2A_LOG_PATH, shared by every router."""
+    global _default_writer
+    with _default_writer_lock:
+        if _default_writer is None:
+            migrate_legacy_log()
+            _default_writer = A2ALogWriter()
+        return _default_writer
+
+
 class A2ARouter:
-    def __init__(self):
+    def __init__(self, log_writer=None, max_fanout=16):
         self.routes = {}
+        self.log_writer = log_writer or default_log_writer()
+        # Own pool for fan-out legs so stragglers never hold up the event loop's shutdown
+        self._executor = ThreadPoolExecutor(max_workers=max_fanout, thread_name_prefix="a2a-fanout")
 
     def register(self, name, client):
         self.routes[name] = client
@@ -33,24 +201,7 @@ class A2ARouter:
     def _log_message(self, message: A2AMessage, result):
         entry = message.to_dict()
         entry["result"] = result
-
-        try:
-            if not os.path.exists(A2A_LOG_PATH):
-                with open(A2A_LOG_PATH, "w") as f:
-                    json.dump([], f)
-
-            with open(A2A_LOG_PATH, "r") as f:
-                data = json.load(f)
-        except Exception:
-            data = []
-
-        data.append(entry)
-
-        try:
-            with open(A2A_LOG_PATH, "w") as f:
-                json.dump(data, f, indent=2)
-        except Exception:
-            pass
+        self.log_writer.log(entry)
 
     def send(self, message: A2AMessage, target_client=None):
         client = target_client or self.routes.get(message.to_agent)
@@ -68,3 +219,73 @@ class A2ARouter:
         err = {"error": "no target client"}
         self._log_message(message, err)
         return err
+
+    async def send_many(self, message: A2AMessage, targets=None, deadline=DEFAULT_DEADLINE, accept=None, first=False):
+        """
+        Sends `message` to several registered clients concurrently.
+
+        Args:
+            targets: route names to send to (default: every registered route)
+            deadline: per-target timeout in seconds, or a {name: seconds} dict
+                (targets missing from it get DEFAULT_DEADLINE)
+            accept: predicate on a result; default accepts anything without "error"
+            first: return the first accepted (name, result) and cancel the rest
+
+        Returns:
+            {name: result} for every target, or (name, result) / (None, None)
+            when `first` is set. Every leg is logged under the message's
+            trace_id. A cancelled straggler's blocking handoff call finishes in
+            its worker thread, but its result is discarded.
+        """
+        names = list(targets) if targets is not None else list(self.routes)
+        accept = accept or (lambda result: isinstance(result, dict) and "error" not in result)
+        loop = asyncio.get_running_loop()
+
+        async def leg(name):
+            leg_msg = A2AMessage(
+                from_agent=message.from_agent,
+                to_agent=name,
+                payload=message.payload,
+                trace_id=message.trace_id
+            )
+            client = self.routes.get(name)
+            timeout = deadline.get(name, DEFAULT_DEADLINE) if isinstance(deadline, dict) else deadline
+
+            if client is None:
+                result = {"error": "no target client"}
+            else:
+                try:
+                    result = await asyncio.wait_for(
+                        loop.run_in_executor(self._executor, client.handoff, message.payload), timeout
+                    )
+                except asyncio.TimeoutError:
+                    result = {"error": f"deadline of {timeout}s exceeded"}
+                except asyncio.CancelledError:
+                    self._log_message(leg_msg, {"error": "cancelled"})
+                    raise
+                except Exception as e:
+                    result = {"error": str(e)}
+
+            self._log_message(leg_msg, result)
+            return name, result
+
+        tasks = [asyncio.ensure_future(leg(name)) for name in names]
+
+        if not first:
+            return dict(await asyncio.gather(*tasks))
+
+        try:
+            for done in asyncio.as_completed(tasks):
+                name, result = await done
+                if accept(result):
+                    return name, result
+            return None, None
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def broadcast(self, message: A2AMessage, **kwargs):
+        """send_many() to every registered route."""
+        return await self.send_many(message, targets=None, **kwargs)
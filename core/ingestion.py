@@ -0,0 +1,283 @@
+# core/ingestion.py
+import json
+import queue
+import random
+import socket
+import threading
+import time
+from datetime import datetime
+
+from core.sessions import iter_memory_bank
+
+MAX_RATE_HZ = 250
+
+
+def mock_vitals():
+    """Mock vitals - replace with real IoT."""
+    return {
+        "hr": random.randint(130, 160),
+        "bp_systolic": random.randint(70, 95),
+        "spo2": random.randint(84, 92)
+    }
+
+
+class VitalsSource:
+    """
+    A producer of vitals readings.
+
+    `read()` blocks until the next reading is available and returns a dict
+    of vitals, or None once the source is exhausted.
+    """
+
+    name = "source"
+
+    def read(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class _Pacer:
+    """Sleeps until the next tick of a fixed-rate clock (no drift)."""
+
+    def __init__(self, rate_hz):
+        if not 0 < rate_hz <= MAX_RATE_HZ:
+            raise ValueError(f"rate_hz must be in (0, {MAX_RATE_HZ}]")
+        self.period = 1.0 / rate_hz
+        self._next = time.monotonic()
+
+    def wait(self):
+        self._next += self.period
+        delay = self._next - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            # Fell behind; resync instead of bursting to catch up
+            self._next = time.monotonic()
+
+
+class SimulatedVitalsSource(VitalsSource):
+    """Generator-backed source at a fixed sample rate (up to 250 Hz)."""
+
+    def __init__(self, rate_hz=1.0, generator=mock_vitals, name="simulated"):
+        self.name = name
+        self.generator = generator
+        self._pacer = _Pacer(rate_hz)
+        self._first = True
+
+    def read(self):
+        if self._first:
+            self._first = False
+        else:
+            self._pacer.wait()
+        return self.generator()
+
+
+class ReplayVitalsSource(VitalsSource):
+    """
+    Replays recorded vitals from a JSONL file or a MemoryBank store, or
+    from already-loaded `records` (readings carrying a "ts").
+
+    `speed` scales the recorded inter-sample gaps (2.0 = twice as fast);
+    `speed=None` replays as fast as possible.
+    """
+
+    def __init__(self, path=None, speed=1.0, name="replay", records=None):
+        self.name = name
+        self.speed = speed
+        self._records = iter(records) if records is not None else self._load(path)
+        self._last_ts = None
+        self._last_wall = None
+
+    @staticmethod
+    def _load(path):
+        if path.endswith(".json"):
+            # MemoryBank: take its vitals events
+            for entry in iter_memory_bank(path):
+                if entry.get("type") == "vitals":
+                    ts = entry.get("ts")
+                    if isinstance(ts, str):
+                        ts = datetime.fromisoformat(ts).timestamp()
+                    yield {**entry["payload"], "ts": ts}
+            return
+
+        with open(path, "r") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def read(self):
+        record = next(self._records, None)
+        if record is None:
+            return None
+
+        ts = record.get("ts")
+        if self.speed and ts is not None and self._last_ts is not None:
+            delay = (ts - self._last_ts) / self.speed - (time.monotonic() - self._last_wall)
+            if delay > 0:
+                time.sleep(delay)
+        self._last_ts = ts
+        self._last_wall = time.monotonic()
+        return record
+
+
+class SocketVitalsSource(VitalsSource):
+    """
+    Newline-delimited JSON vitals over a local TCP socket, standing in for
+    a serial/Bluetooth monitor link.
+    """
+
+    def __init__(self, host="127.0.0.1", port=9750, name="socket", timeout=5.0):
+        self.name = name
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._sock.settimeout(None)
+        self._reader = self._sock.makefile("r")
+
+    def read(self):
+        while True:
+            line = self._reader.readline()
+            if not line:
+                return None
+            line = line.strip()
+            if line:
+                try:
+                    return json.loads(line)
+                except ValueError:
+                    continue
+
+    def close(self):
+        # Shut the socket down first: a producer blocked in readline() holds
+        # the reader's lock, and only EOF on the socket releases it
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+        try:
+            self._reader.close()
+        except OSError:
+            pass
+
+
+class VitalsIngestor:
+    """
+    Runs vitals sources concurrently with the rest of the pipeline.
+
+    Every source gets a producer thread that stamps each reading with its
+    acquisition time (`ts`), its `source` name and, when the source sent
+    one, the device clock (`source_ts`), then puts it on one bounded queue.
+    A single consumer thread hands readings to subscribers in arrival order.
+    When the queue is full, producers block (back-pressure) or, with
+    `drop_oldest=True`, the oldest queued reading is discarded so consumers
+    always see fresh data. Readings and `stats()` identify sources by
+    name, so every source needs a distinct one.
+    """
+
+    def __init__(self, sources, max_queue=1024, drop_oldest=False):
+        self.sources = list(sources)
+        names = [s.name for s in self.sources]
+        if len(set(names)) != len(names):
+            raise ValueError(f"vitals sources need distinct names, got {names}")
+        self.drop_oldest = drop_oldest
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._subscribers = []
+        self._stop = threading.Event()
+        self._threads = []
+        self._stats_lock = threading.Lock()
+        self._stats = {s.name: {"read": 0, "dropped": 0, "blocked": 0} for s in self.sources}
+        self._max_lag = 0.0
+
+    def subscribe(self, callback):
+        """`callback(reading)` runs on the consumer thread for each reading."""
+        self._subscribers.append(callback)
+
+    def start(self):
+        self._stop.clear()
+        for source in self.sources:
+            t = threading.Thread(target=self._produce, args=(source,), name=f"vitals-{source.name}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        consumer = threading.Thread(target=self._consume, name="vitals-consumer", daemon=True)
+        consumer.start()
+        self._threads.append(consumer)
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        for source in self.sources:
+            source.close()
+        for t in self._threads:
+            t.join(timeout=timeout)
+        self._threads = []
+
+    def _bump(self, name, key):
+        with self._stats_lock:
+            self._stats[name][key] += 1
+
+    def _produce(self, source):
+        while not self._stop.is_set():
+            try:
+                vitals = source.read()
+            except Exception as e:
+                print(f"⚠️ Vitals source {source.name} failed: {e}")
+                return
+            if vitals is None:
+                return
+
+            reading = dict(vitals)
+            if "ts" in reading:
+                # Keep the device/recording clock alongside our acquisition time
+                reading["source_ts"] = reading.pop("ts")
+            reading["ts"] = time.time()
+            reading["source"] = source.name
+            self._bump(source.name, "read")
+            self._enqueue(source.name, reading)
+
+    def _enqueue(self, name, reading):
+        try:
+            self._queue.put_nowait(reading)
+            return
+        except queue.Full:
+            pass
+
+        if self.drop_oldest:
+            try:
+                dropped = self._queue.get_nowait()
+                self._bump(dropped["source"], "dropped")
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(reading)
+            except queue.Full:
+                self._bump(name, "dropped")
+            return
+
+        self._bump(name, "blocked")
+        while not self._stop.is_set():
+            try:
+                self._queue.put(reading, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _consume(self):
+        while not self._stop.is_set() or not self._queue.empty():
+            try:
+                reading = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            lag = time.time() - reading["ts"]
+            if lag > self._max_lag:
+                self._max_lag = lag
+
+            for callback in self._subscribers:
+                try:
+                    callback(reading)
+                except Exception as e:
+                    print(f"⚠️ Vitals subscriber failed: {e}")
+
+    def stats(self):
+        with self._stats_lock:
+            out = {name: dict(s) for name, s in self._stats.items()}
+        return {"sources": out, "queued": self._queue.qsize(), "max_lag_s": self._max_lag}
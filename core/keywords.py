@@ -0,0 +1,120 @@
+# core/keywords.py
+import re
+from collections import namedtuple
+
+# Declarative keyword rules: (category, label, keywords), in priority order
+# within each category. Keywords match whole words, case-insensitively; a
+# trailing "*" also matches any word that starts with the stem ("burn*"
+# -> burn, burns, burned) without matching inside other words ("head" does
+# not match "ahead"). Only stem words whose every continuation is medical:
+# "leg*" would match "legal" and "rib*" "ribbon", so those list their forms.
+#
+# Protocol keywords live with the protocols themselves (protocols/*.json);
+# ProtocolRegistry prepends them to these rules in its own index.
+RULES = (
+    ("specialist", "Burns Specialist", ("burn*",)),
+    ("specialist", "Neurosurgeon", ("head", "forehead", "scalp", "skull")),
+    ("specialist", "Cardiothoracic Surgeon", ("chest", "rib", "ribs")),
+    ("specialist", "Orthopedic Surgeon", ("leg", "legs", "fracture*")),
+    ("specialist", "Trauma Surgeon", ("trauma*", "fall", "falls", "fell", "fallen")),
+
+    ("ward", "BURN WARD", ("burn*",)),
+)
+
+# category/label: the rule that fired; keyword: the rule keyword;
+# start/end: span of the matched word in the original text
+KeywordMatch = namedtuple("KeywordMatch", ["category", "label", "keyword", "start", "end"])
+
+
+class KeywordIndex:
+    """
+    Every rule keyword compiled into one regex, so a report is scanned in
+    a single pass no matter how many rules there are.
+
+    Keywords are merged into a character trie before compiling, so at each
+    word start the regex follows one branch instead of trying every
+    keyword in turn. An empty named group marks where each keyword ends;
+    `lastgroup` maps a hit back to every (category, label) rule using it.
+    """
+
+    def __init__(self, rules=RULES):
+        self.rules = tuple(rules)
+        self._priority = {}
+        by_keyword = {}
+        for category, label, keywords in self.rules:
+            self._priority.setdefault((category, label), len(self._priority))
+            for keyword in keywords:
+                by_keyword.setdefault(keyword.lower(), []).append((category, label))
+
+        self.keywords = tuple(by_keyword)
+        self._targets = {f"k{i}": (keyword, tuple(by_keyword[keyword]))
+                         for i, keyword in enumerate(self.keywords)}
+
+        trie = {}
+        for i, keyword in enumerate(self.keywords):
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = f"k{i}"
+
+        if trie:
+            body = r"\b" + self._compile_trie(trie) + r"\b"
+            # Text is lowercased before scanning; IGNORECASE is only needed
+            # for the rare strings whose length changes when lowercased
+            self.pattern = re.compile(body)
+            self._pattern_ci = re.compile(body, re.IGNORECASE)
+        else:
+            self.pattern = self._pattern_ci = None
+
+    @classmethod
+    def _compile_trie(cls, node):
+        alternatives = []
+        for char, child in sorted(node.items()):
+            if char == "":
+                continue
+            head = r"\w*" if char == "*" else re.escape(char)
+            alternatives.append(head + cls._compile_trie(child))
+        if "" in node:
+            # Tried last, so longer keywords sharing this prefix win
+            alternatives.append(f"(?P<{node['']}>)")
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return "(?:" + "|".join(alternatives) + ")"
+
+    def scan(self, text):
+        """Every rule match in `text`, in text order."""
+        if not text or self.pattern is None:
+            return []
+        folded = text.lower()
+        if len(folded) == len(text):
+            hits = self.pattern.finditer(folded)
+        else:
+            hits = self._pattern_ci.finditer(text)
+
+        matches = []
+        for m in hits:
+            keyword, targets = self._targets[m.lastgroup]
+            start, end = m.span()
+            for category, label in targets:
+                matches.append(KeywordMatch(category, label, keyword, start, end))
+        return matches
+
+    def labels(self, text, category, matches=None):
+        """
+        Distinct labels of `category` found in `text` (or in precomputed
+        `matches`), in rule priority order.
+        """
+        if matches is None:
+            matches = self.scan(text)
+        found = {m.label for m in matches if m.category == category}
+        return sorted(found, key=lambda label: self._priority[(category, label)])
+
+    def classify(self, text):
+        """{category: [labels]} for one scan of `text`."""
+        matches = self.scan(text)
+        return {category: self.labels(None, category, matches)
+                for category in dict.fromkeys(c for c, _, _ in self.rules)}
+
+
+# Shared index, built once at import
+KEYWORDS = KeywordIndex()
@@ -1,33 +1,250 @@
 # core/observability.py
+import atexit
+import functools
+import json
+import math
+import os
+import threading
 import time
+from bisect import bisect_left
 from datetime import datetime, timezone
 
+METRICS_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'metrics.json'))
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram (HDR-style).
+
+    Bucket bounds grow geometrically by `2 ** (1 / precision)` from
+    `lowest` to `highest` seconds, so every recorded value lands in a
+    bucket whose width is a fixed fraction of the value (about 9% with the
+    default precision of 8). Recording is a binary search plus an
+    increment; memory stays constant however many samples arrive.
+    """
+
+    def __init__(self, lowest=1e-6, highest=1e3, precision=8):
+        factor = 2 ** (1 / precision)
+        n = int(math.ceil(math.log(highest / lowest, factor))) + 1
+        self.bounds = [lowest * factor ** i for i in range(n)]
+        self.counts = [0] * (n + 1)  # last bucket: above `highest`
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Adds the samples of `other` (same bucket layout), e.g. from another process."""
+        if other.bounds != self.bounds:
+            raise ValueError("cannot merge histograms with different bucket bounds")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile, clamped to [min, max]."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                bound = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(max(bound, self.min), self.max)
+        return self.max
+
+    def snapshot(self):
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "min": self.min,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max
+        }
+
+
+class _Token:
+    __slots__ = ("key", "started")
+
+    def __init__(self, key):
+        self.key = key
+        self.started = time.perf_counter()
+
+
+class Timer:
+    """
+    Times a block (`with metrics.timer("x"):`) or every call of a function
+    (`@metrics.timer("x")`) into the `x` histogram. Each entry or call gets
+    its own token, so nested, repeated and concurrent timings never clobber
+    each other.
+    """
+
+    def __init__(self, metrics, key):
+        self.metrics = metrics
+        self.key = key
+        self._local = threading.local()
+
+    def __enter__(self):
+        stack = self._local.__dict__.setdefault("tokens", [])
+        stack.append(self.metrics.start(self.key))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.stop(self._local.tokens.pop())
+        if exc_type is not None:
+            self.metrics.count(f"{self.key}.errors")
+        return False
+
+    def __call__(self, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with self:
+                return fn(*args, **kwargs)
+        return wrapper
+
 
 class Metrics:
     """
     Tracks counters and timings for AEGIS observability.
+
+    Counters, gauges and latency histograms are safe to update from any
+    thread. `start()` returns a per-call token for `stop()`; `timer()`
+    wraps the pair as a context manager or decorator.
     """
 
     def __init__(self):
         self.counters = {}
-        self.timers = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._open = {}  # key -> tokens started by key and not yet stopped
+        self._lock = threading.Lock()
+
+    def count(self, key, n=1):
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def gauge(self, key, value):
+        with self._lock:
+            self.gauges[key] = value
 
-    def count(self, key):
-        self.counters[key] = self.counters.get(key, 0) + 1
+    def observe(self, key, seconds):
+        """Records one latency sample into the `key` histogram."""
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram()
+            hist.record(seconds)
 
     def start(self, key):
-        self.timers[key] = time.perf_counter()
+        token = _Token(key)
+        with self._lock:
+            self._open.setdefault(key, []).append(token)
+        return token
 
-    def stop(self, key):
-        if key in self.timers:
-            elapsed = time.perf_counter() - self.timers[key]
-            self.timers[key] = elapsed
-            return elapsed
-        return None
+    def stop(self, token):
+        """
+        Records the elapsed time of `token` and returns it. A key is also
+        accepted and stops the most recent open timing for that key.
+        """
+        with self._lock:
+            if not isinstance(token, _Token):
+                open_tokens = self._open.get(token)
+                if not open_tokens:
+                    return None
+                token = open_tokens[-1]
+            open_tokens = self._open.get(token.key, [])
+            if token in open_tokens:
+                open_tokens.remove(token)
+        elapsed = time.perf_counter() - token.started
+        self.observe(token.key, elapsed)
+        return elapsed
+
+    def timer(self, key):
+        return Timer(self, key)
+
+    def histogram(self, key):
+        """Snapshot of one histogram ({"count": 0} if nothing recorded)."""
+        with self._lock:
+            hist = self.histograms.get(key)
+            return hist.snapshot() if hist is not None else {"count": 0}
 
     def export(self):
-        return {
-            "time": datetime.now(timezone.utc).isoformat(),
-            "counters": self.counters,
-            "timers": self.timers
-        }
+        with self._lock:
+            return {
+                "time": datetime.now(timezone.utc).isoformat(),
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "histograms": {key: hist.snapshot() for key, hist in self.histograms.items()}
+            }
+
+
+class MetricsExporter:
+    """
+    Periodically writes `metrics.export()` to a JSON file (atomically, via
+    a temp file and rename) so the dashboard process can serve it.
+    `snapshots` maps further paths to callables whose JSON-friendly
+    results are written alongside on the same schedule.
+    """
+
+    def __init__(self, metrics, path=METRICS_PATH, interval=2.0, snapshots=None):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.snapshots = dict(snapshots or {})
+        self._stop = threading.Event()
+        self._thread = None
+        atexit.register(self.close)
+
+    @staticmethod
+    def _dump(path, doc):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(doc, f, indent=2)
+        os.replace(tmp, path)
+
+    def write(self):
+        self._dump(self.path, self.metrics.export())
+        for path, snapshot in self.snapshots.items():
+            self._dump(path, snapshot())
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def loop():
+            while not self._stop.wait(self.interval):
+                try:
+                    self.write()
+                except OSError as e:
+                    print(f"⚠️ Metrics export failed: {e}")
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name="metrics-export", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+            try:
+                self.write()
+            except OSError:
+                pass
@@ -1,40 +1,340 @@
 # core/sessions.py
+import atexit
+import heapq
 import json
 import os
+import threading
+import time
+from collections import namedtuple
 from datetime import datetime, timezone
 
 
+# One stored session event. `ts` is time.monotonic() (ordering and range
+# queries); `wall` is time.time() for display and persistence.
+SessionEvent = namedtuple("SessionEvent", ["seq", "type", "payload", "ts", "wall"])
+
+DEFAULT_CAPACITY = 1024
+SPILL_EVENT = "session_spill"
+
+
+class _EventRing:
+    """
+    Fixed-size ring of SessionEvents of one type, addressed by absolute
+    position (0 = first event ever added). Positions below `first` have
+    been overwritten. Writers are serialized by the caller; readers take
+    no lock and re-check `first` after each read, so an event overwritten
+    mid-iteration is skipped rather than returned in the wrong place.
+    """
+
+    __slots__ = ("capacity", "buf", "first", "total")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.buf = [None] * capacity
+        self.first = 0
+        self.total = 0
+
+    def __len__(self):
+        return self.total - self.first
+
+    def append(self, event):
+        """Stores `event`; returns the event it overwrote, if any."""
+        slot = self.total % self.capacity
+        evicted = None
+        if self.total - self.first == self.capacity:
+            evicted = self.buf[slot]
+            # Advance before overwriting: readers detect the eviction
+            self.first += 1
+        self.buf[slot] = event
+        self.total += 1
+        return evicted
+
+    def get(self, pos):
+        event = self.buf[pos % self.capacity]
+        return event if self.first <= pos < self.total else None
+
+    def bisect(self, ts):
+        """First position whose event has `ts` >= the given one."""
+        lo, hi = self.first, self.total
+        while lo < hi:
+            mid = (lo + hi) // 2
+            event = self.buf[mid % self.capacity]
+            if event is not None and event.ts < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def iter_range(self, start=None, end=None):
+        lo = self.first if start is None else self.bisect(start)
+        hi = self.total if end is None else self.bisect(end)
+        for pos in range(lo, hi):
+            event = self.get(pos)
+            if event is not None:
+                yield event
+
+
 class InMemorySessionService:
     """
     Stores session messages and events for the duration of the run.
+
+    Each event type has its own ring buffer (`capacities` per type,
+    `capacity` otherwise), so memory stays bounded on long transports
+    and per-type queries never scan other types. Events carry a global
+    `seq` and a monotonic `ts`; `events()` filters by type and time
+    range (binary search) and yields the stored events without copying.
+
+    Events pushed out of a full ring go to `spill`, a MemoryBank (or any
+    `save(event_type, payload)` callable), in batches of `spill_batch`
+    as one "session_spill" entry each; without `spill` they are dropped
+    and counted.
     """
 
-    def __init__(self):
-        self.session = []
+    def __init__(self, capacity=DEFAULT_CAPACITY, capacities=None, spill=None, spill_batch=64):
+        self.capacity = capacity
+        self.capacities = dict(capacities or {})
+        self.spill_batch = spill_batch
+        self._spill = getattr(spill, "save", spill)
+        self._rings = {}
+        self._counts = {}  # type -> [added, spilled, dropped]
+        self._pending_spill = []
+        self._seq = 0
+        self._lock = threading.Lock()
 
     def add_event(self, event_type, payload):
-        entry = {
-            "type": event_type,
-            "payload": payload,
-            "ts": datetime.now(timezone.utc).isoformat()
-        }
-        self.session.append(entry)
-        return entry
+        spill = None
+        with self._lock:
+            ring = self._rings.get(event_type)
+            if ring is None:
+                ring = self._rings[event_type] = _EventRing(self.capacities.get(event_type, self.capacity))
+                self._counts[event_type] = [0, 0, 0]
+            event = SessionEvent(self._seq, event_type, payload, time.monotonic(), time.time())
+            self._seq += 1
+            evicted = ring.append(event)
+            counts = self._counts[event_type]
+            counts[0] += 1
+            if evicted is not None:
+                if self._spill is None:
+                    counts[2] += 1
+                else:
+                    counts[1] += 1
+                    self._pending_spill.append(evicted)
+                    if len(self._pending_spill) >= self.spill_batch:
+                        spill, self._pending_spill = self._pending_spill, []
+        if spill:
+            self._write_spill(spill)
+        return event
+
+    def _write_spill(self, events):
+        self._spill(SPILL_EVENT, {"events": [
+            {"seq": e.seq, "type": e.type, "payload": e.payload,
+             "ts": datetime.fromtimestamp(e.wall, timezone.utc).isoformat()}
+            for e in events
+        ]})
+
+    def flush(self):
+        """Writes spilled events still waiting for a full batch."""
+        with self._lock:
+            spill, self._pending_spill = self._pending_spill, []
+        if spill:
+            self._write_spill(spill)
+
+    def events(self, event_type=None, start=None, end=None):
+        """
+        Iterates held events in `seq` order, optionally of one type (or a
+        tuple of types) and with `start <= ts < end` (monotonic seconds).
+        """
+        if event_type is None:
+            # add_event may be creating a ring; snapshot the keys under its lock
+            with self._lock:
+                types = list(self._rings)
+        elif isinstance(event_type, str):
+            types = [event_type]
+        else:
+            types = list(event_type)
+
+        rings = [self._rings[t] for t in types if t in self._rings]
+        if len(rings) == 1:
+            return rings[0].iter_range(start, end)
+        return heapq.merge(*(r.iter_range(start, end) for r in rings), key=lambda e: e.seq)
+
+    def recent(self, event_type=None, seconds=60.0):
+        """
+        Events from the last `seconds`, as far back as the rings still
+        reach. A ring holds only its `capacity` newest events, so at high
+        rates the answer can cover less than `seconds`. Older events were
+        spilled or dropped.
+        """
+        return self.events(event_type, start=time.monotonic() - seconds)
+
+    def last(self, event_type):
+        """Most recent event of `event_type`, or None."""
+        ring = self._rings.get(event_type)
+        return ring.get(ring.total - 1) if ring is not None and ring.total else None
+
+    def count(self, event_type=None):
+        """Events held in memory (of one type, or all)."""
+        if event_type is not None:
+            ring = self._rings.get(event_type)
+            return len(ring) if ring is not None else 0
+        with self._lock:
+            rings = list(self._rings.values())
+        return sum(len(r) for r in rings)
+
+    def __len__(self):
+        return self.count()
+
+    def stats(self):
+        with self._lock:
+            return {
+                t: {"held": len(self._rings[t]), "capacity": self._rings[t].capacity,
+                    "added": c[0], "spilled": c[1], "dropped": c[2]}
+                for t, c in self._counts.items()
+            }
 
     def get_history(self):
-        return self.session[:]
+        """Held events as a list of {type, payload, ts (ISO)} dicts (a copy; prefer events())."""
+        return [
+            {"type": e.type, "payload": e.payload, "ts": datetime.fromtimestamp(e.wall, timezone.utc).isoformat()}
+            for e in self.events()
+        ]
 
 
 class MemoryBank:
     """
-    Persists important events to memory_bank.json.
+    Persists important events to an append-only, segmented log.
+
+    Each entry is one JSON line. Segments rotate once they reach
+    `segment_bytes`, fsync is batched every `fsync_every` entries or
+    `fsync_interval` seconds, and `index.json` records where each
+    segment starts so readers can skip straight to a sequence number.
+
+    `path` is the legacy memory_bank.json location; segments live in the
+    sibling `<name>.d/` directory and a legacy JSON array found at `path`
+    is migrated into it once.
     """
 
-    def __init__(self, path):
+    INDEX_NAME = "index.json"
+
+    def __init__(self, path, segment_bytes=4 * 1024 * 1024, fsync_every=64, fsync_interval=1.0):
         self.path = path
-        if not os.path.exists(path):
-            with open(path, "w") as f:
-                json.dump([], f)
+        self.dir = os.path.splitext(path)[0] + ".d"
+        self.segment_bytes = segment_bytes
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+
+        self._lock = threading.Lock()
+        self._fh = None
+        self._closed = False
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        os.makedirs(self.dir, exist_ok=True)
+        self.segments = self._load_index()
+        self._recover_tail()
+
+        if os.path.exists(path):
+            self.migrate_json(path)
+
+        atexit.register(self.close)
+
+    def _segment_path(self, name):
+        return os.path.join(self.dir, name)
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.dir, self.INDEX_NAME), "r") as f:
+                segments = json.load(f)["segments"]
+        except (OSError, ValueError, KeyError):
+            segments = []
+
+        # Segments written after the last index flush are still on disk.
+        known = {s["name"] for s in segments}
+        for name in sorted(os.listdir(self.dir)):
+            if name.endswith(".jsonl") and name not in known:
+                first_seq = segments[-1]["first_seq"] + segments[-1]["count"] if segments else 0
+                segments.append({"name": name, "first_seq": first_seq, "count": 0, "bytes": 0})
+        return segments
+
+    def _write_index(self):
+        tmp = os.path.join(self.dir, self.INDEX_NAME + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"segments": self.segments}, f)
+        os.replace(tmp, os.path.join(self.dir, self.INDEX_NAME))
+
+    def _recover_tail(self):
+        """Recount the active segment and drop a torn trailing line."""
+        if not self.segments:
+            return
+
+        tail = self.segments[-1]
+        seg_path = self._segment_path(tail["name"])
+        if not os.path.exists(seg_path):
+            tail["count"], tail["bytes"] = 0, 0
+            return
+
+        count = 0
+        good_bytes = 0
+        with open(seg_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                count += 1
+                good_bytes += len(line)
+
+        if good_bytes != os.path.getsize(seg_path):
+            with open(seg_path, "r+b") as f:
+                f.truncate(good_bytes)
+
+        tail["count"], tail["bytes"] = count, good_bytes
+
+    @property
+    def next_seq(self):
+        if not self.segments:
+            return 0
+        return self.segments[-1]["first_seq"] + self.segments[-1]["count"]
+
+    def _open_tail(self):
+        if not self.segments or self.segments[-1]["bytes"] >= self.segment_bytes:
+            self._rotate()
+        if self._fh is None:
+            self._fh = open(self._segment_path(self.segments[-1]["name"]), "ab")
+            self._closed = False
+
+    def _rotate(self):
+        if self._fh is not None:
+            self._sync()
+            self._fh.close()
+            self._fh = None
+
+        name = f"{len(self.segments):08d}.jsonl"
+        self.segments.append({"name": name, "first_seq": self.next_seq, "count": 0, "bytes": 0})
+        self._write_index()
+
+    def _sync(self):
+        if self._fh is None:
+            return
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _append(self, entry):
+        line = (json.dumps(entry) + "\n").encode("utf-8")
+        self._open_tail()
+        self._fh.write(line)
+        # Flush to the OS on every write so other processes (the dashboard)
+        # can read the entry; only the fsync is batched.
+        self._fh.flush()
+
+        tail = self.segments[-1]
+        tail["count"] += 1
+        tail["bytes"] += len(line)
+
+        self._unsynced += 1
+        if (self._unsynced >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval):
+            self._sync()
 
     def save(self, event_type, payload):
         entry = {
@@ -43,15 +343,107 @@ class MemoryBank:
             "ts": datetime.now(timezone.utc).isoformat()
         }
 
+        with self._lock:
+            self._append(entry)
+
+        return entry
+
+    def flush(self):
+        with self._lock:
+            self._sync()
+            if self.segments:
+                self._write_index()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._fh is not None:
+                self._sync()
+                self._fh.close()
+                self._fh = None
+            if self.segments:
+                self._write_index()
+
+    def iter_entries(self, since=0):
+        """
+        Yields entries in write order, starting at sequence number `since`.
+        """
+        with self._lock:
+            if self._fh is not None:
+                self._fh.flush()
+        return iter_memory_bank(self.path, since)
+
+    def __iter__(self):
+        return self.iter_entries()
+
+    def __len__(self):
+        return self.next_seq
+
+    def migrate_json(self, legacy_path):
+        """
+        One-shot import of a legacy memory_bank.json array.
+
+        The legacy file is renamed to `<path>.migrated` afterwards so the
+        import never runs twice.
+        """
         try:
-            with open(self.path, "r") as f:
+            with open(legacy_path, "r") as f:
                 data = json.load(f)
-        except:
+        except (OSError, ValueError):
             data = []
 
-        data.append(entry)
+        if not isinstance(data, list):
+            data = []
 
-        with open(self.path, "w") as f:
-            json.dump(data, f, indent=2)
+        with self._lock:
+            for entry in data:
+                self._append(entry)
+            self._sync()
+            if self.segments:
+                self._write_index()
 
-        return entry
+        os.replace(legacy_path, legacy_path + ".migrated")
+        return len(data)
+
+
+def iter_memory_bank(path, since=0):
+    """
+    Read-only iterator over a MemoryBank store, safe to use from another
+    process while AEGIS is writing. Segments that end before `since` are
+    skipped using the index; a torn trailing line is ignored.
+    """
+    seg_dir = os.path.splitext(path)[0] + ".d"
+    try:
+        names = sorted(n for n in os.listdir(seg_dir) if n.endswith(".jsonl"))
+    except OSError:
+        return
+
+    try:
+        with open(os.path.join(seg_dir, MemoryBank.INDEX_NAME), "r") as f:
+            first_seqs = {s["name"]: s["first_seq"] for s in json.load(f)["segments"]}
+    except (OSError, ValueError, KeyError):
+        first_seqs = {}
+
+    seq = 0
+    for i, name in enumerate(names):
+        # Only jump ahead when the *next* segment's start is known.
+        next_name = names[i + 1] if i + 1 < len(names) else None
+        if next_name in first_seqs and first_seqs[next_name] <= since:
+            seq = first_seqs[next_name]
+            continue
+
+        seq = first_seqs.get(name, seq)
+        try:
+            f = open(os.path.join(seg_dir, name), "rb")
+        except OSError:
+            continue
+
+        with f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                if seq >= since:
+                    yield json.loads(line)
+                seq += 1
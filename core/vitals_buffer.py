@@ -0,0 +1,111 @@
+# core/vitals_buffer.py
+import math
+import time
+from array import array
+
+
+class VitalsBuffer:
+    """
+    Fixed-capacity, columnar ring buffer of vitals readings.
+
+    Each column (timestamp, hr, bp_systolic, spo2) is a typed array stored
+    twice back to back, so the most recent `n` readings are always one
+    contiguous slice and `window()` can hand out memoryviews without
+    copying. Missing values are stored as NaN.
+
+    Optional `tiers` keep downsampled long-term history: each
+    `(factor, capacity)` pair averages every `factor` readings into its own
+    VitalsBuffer.
+    """
+
+    VITALS = ("hr", "bp_systolic", "spo2")
+
+    def __init__(self, capacity=3600, tiers=()):
+        self.capacity = capacity
+        self.columns = {"ts": array("d", bytes(8 * 2 * capacity))}
+        for key in self.VITALS:
+            self.columns[key] = array("f", bytes(4 * 2 * capacity))
+
+        self._head = 0
+        self._size = 0
+        self.total_count = 0
+
+        self.tiers = [(factor, VitalsBuffer(tier_capacity)) for factor, tier_capacity in tiers]
+        self._tier_acc = [self._empty_acc() for _ in self.tiers]
+
+    def _empty_acc(self):
+        return {key: [0.0, 0] for key in self.VITALS}
+
+    def append(self, vitals, ts=None):
+        ts = time.time() if ts is None else ts
+        i, mirror = self._head, self._head + self.capacity
+
+        self.columns["ts"][i] = self.columns["ts"][mirror] = ts
+        for key in self.VITALS:
+            value = vitals.get(key)
+            value = math.nan if value is None else value
+            self.columns[key][i] = self.columns[key][mirror] = value
+
+        self._head = (self._head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self.total_count += 1
+
+        for (factor, tier), acc in zip(self.tiers, self._tier_acc):
+            for key in self.VITALS:
+                value = vitals.get(key)
+                if value is not None:
+                    acc[key][0] += value
+                    acc[key][1] += 1
+            if self.total_count % factor == 0:
+                tier.append({key: total / n for key, (total, n) in acc.items() if n}, ts=ts)
+                acc.update(self._empty_acc())
+
+    def __len__(self):
+        return self._size
+
+    def window(self, n=None):
+        """
+        Zero-copy views of the last `n` readings (oldest first), keyed by
+        column name. Views are live: they see later overwrites once the
+        ring wraps past them.
+        """
+        n = self._size if n is None else max(0, min(n, self._size))
+        end = self._head + self.capacity
+        return {name: memoryview(col)[end - n:end] for name, col in self.columns.items()}
+
+    def _row(self, index):
+        row = {}
+        for key in self.VITALS:
+            value = self.columns[key][index]
+            if not math.isnan(value):
+                row[key] = int(value) if value.is_integer() else value
+        row["ts"] = self.columns["ts"][index]
+        return row
+
+    def latest(self):
+        if not self._size:
+            return None
+        return self[-1]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(self._head + self.capacity - self._size + i)
+                    for i in range(*index.indices(self._size))]
+
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("vitals buffer index out of range")
+        return self._row(self._head + self.capacity - self._size + index)
+
+    def __iter__(self):
+        start = self._head + self.capacity - self._size
+        for i in range(self._size):
+            yield self._row(start + i)
+
+    def to_dict(self, n=None):
+        """JSON-friendly columns for the last `n` readings (NaN -> None)."""
+        return {
+            name: [None if math.isnan(v) else v for v in view]
+            for name, view in self.window(n).items()
+        }
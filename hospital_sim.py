@@ -1,46 +1,274 @@
 # hospital_sim.py
 from flask import Flask, request, jsonify
+from werkzeug.serving import make_server
+import argparse
+import atexit
+import multiprocessing
+import queue
+import signal
+import socket
+import threading
 import time
 import json
 import os
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process log locking, single worker only
+    fcntl = None
+
+from core.keywords import KEYWORDS
 
 app = Flask(__name__)
-LOG_FILE = "hospital_logs.json"
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LOG_FILE = os.path.join(BASE_DIR, "hospital_logs.json")
+
+# sync: fsync before responding; batch: respond first, group-commit within
+# flush_interval; off: respond first, leave flushing to the OS
+DURABILITY_MODES = ("sync", "batch", "off")
+
+
+class HandoffLog:
+    """
+    Append-only, lock-protected log of hospital responses.
+
+    New entries go to a JSON-lines write-ahead log next to `path`
+    (`hospital_logs.wal.jsonl`), one line each, so a write costs the same
+    however long the history is. Every `compact_every` entries (or
+    `compact_interval` seconds) the WAL is folded into the `path` snapshot
+    (the JSON array the simulator has always written) with an atomic
+    rename, then truncated.
+
+    With `durability="sync"` append() returns once the line is fsynced.
+    In "batch" and "off" modes append() only queues the entry and a writer
+    thread commits it, so the HTTP response does not wait on the disk.
+    A commit covers whatever arrived within `flush_interval`, at most
+    `max_batch` entries.
+
+    Several processes (the --workers server) may share one log: writes
+    and compaction also hold an flock on `hospital_logs.lock`, and the
+    WAL is opened in append mode, so lines from different workers never
+    interleave and a compaction never loses another worker's entries.
+    """
+
+    def __init__(self, path=LOG_FILE, durability="batch", flush_interval=0.05,
+                 compact_every=1000, compact_interval=30.0, max_batch=512):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {DURABILITY_MODES}")
+        self.path = os.path.abspath(path)
+        self.wal_path = os.path.splitext(self.path)[0] + ".wal.jsonl"
+        self.durability = durability
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.compact_every = compact_every
+        self.compact_interval = compact_interval
+
+        self._lock = threading.Lock()
+        self._lock_fh = open(os.path.splitext(self.path)[0] + ".lock", "a") if fcntl else None
+        self._fh = open(self.wal_path, "ab")
+        with self._locked(shared=True):
+            self._wal_entries = self._count_wal()
+        self._last_compact = time.monotonic()
+        self.counts = {"written": 0, "fsyncs": 0, "compactions": 0, "errors": 0}
+
+        self._queue = None
+        self._writer = None
+        if durability != "sync":
+            self._queue = queue.Queue()
+            self._writer = threading.Thread(target=self._write_loop, name="hospital-log", daemon=True)
+            self._writer.start()
+        atexit.register(self.close)
+
+    @contextmanager
+    def _locked(self, shared=False):
+        """Thread lock plus, where available, an inter-process file lock."""
+        with self._lock:
+            if self._lock_fh is None:
+                yield
+                return
+            fcntl.flock(self._lock_fh, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_fh, fcntl.LOCK_UN)
+
+    def _count_wal(self):
+        with open(self.wal_path, "rb") as f:
+            return sum(1 for line in f if line.endswith(b"\n"))
+
+    def _write_lines(self, entries, fsync):
+        # Caller holds self._locked()
+        self._fh.write(b"".join(json.dumps(e, default=str).encode("utf-8") + b"\n" for e in entries))
+        self._fh.flush()
+        if fsync:
+            os.fsync(self._fh.fileno())
+            self.counts["fsyncs"] += 1
+        self._wal_entries += len(entries)
+        self.counts["written"] += len(entries)
+
+    def append(self, entry):
+        if self._queue is not None:
+            self._queue.put(entry)
+            return
+        with self._locked():
+            self._write_lines([entry], fsync=True)
+            self._maybe_compact()
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            # Group commit: whatever arrives within the window shares one write
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # Commit now even if more is queued, or sustained load never commits
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            stop = None in batch
+            batch = [e for e in batch if e is not None]
+            with self._locked():
+                try:
+                    if batch:
+                        self._write_lines(batch, fsync=self.durability == "batch")
+                    self._maybe_compact()
+                except (OSError, ValueError) as e:
+                    self.counts["errors"] += 1
+                    print(f"⚠️ Hospital log write failed: {e}")
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _maybe_compact(self):
+        due = time.monotonic() - self._last_compact >= self.compact_interval
+        if self._wal_entries >= self.compact_every and self._lock_fh is not None:
+            # Another worker may have compacted since our last look
+            self._wal_entries = self._count_wal()
+        if self._wal_entries >= self.compact_every or (due and self._wal_entries):
+            self._compact()
+
+    def _compact(self):
+        """Folds the WAL into the snapshot. Caller holds self._locked()."""
+        entries = self._read_snapshot()
+        with open(self.wal_path, "rb") as f:
+            for line in f:
+                if line.endswith(b"\n"):
+                    entries.append(json.loads(line))
+
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            # Compact JSON: this runs under the lock every worker writes through
+            json.dump(entries, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+        # Truncate in place: the handle stays O_APPEND, so later writes
+        # from this and other workers land at the end of the new WAL
+        self._fh.truncate(0)
+        self._wal_entries = 0
+        self._last_compact = time.monotonic()
+        self.counts["compactions"] += 1
+
+    def _read_snapshot(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            return data if isinstance(data, list) else []
+        except (OSError, ValueError):
+            return []
+
+    def entries(self):
+        """Snapshot plus WAL, in write order (includes queued-but-unwritten only after flush())."""
+        with self._locked(shared=True):
+            entries = self._read_snapshot()
+            with open(self.wal_path, "rb") as f:
+                entries.extend(json.loads(line) for line in f if line.endswith(b"\n"))
+        return entries
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self.counts,
+                "wal_entries": self._wal_entries,
+                "queued": self._queue.qsize() if self._queue is not None else 0,
+                "durability": self.durability
+            }
+
+    def flush(self):
+        if self._queue is not None:
+            self._queue.join()
+
+    def compact(self):
+        self.flush()
+        with self._locked():
+            self._compact()
+
+    def close(self):
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=5)
+        with self._lock:
+            if not self._fh.closed:
+                self._fh.flush()
+                os.fsync(self._fh.fileno())
+                self._fh.close()
+            if self._lock_fh is not None and not self._lock_fh.closed:
+                self._lock_fh.close()
+
+
+HANDOFF_LOG = None
+_HANDOFF_LOG_LOCK = threading.Lock()
+
+
+def handoff_log(durability=None):
+    """The process-wide HandoffLog, opened on first use."""
+    global HANDOFF_LOG
+    if HANDOFF_LOG is None:
+        with _HANDOFF_LOG_LOCK:
+            # Threaded server: two first requests must not open two logs
+            if HANDOFF_LOG is None:
+                HANDOFF_LOG = HandoffLog(
+                    durability=durability or os.environ.get("HOSPITAL_LOG_DURABILITY", "batch"),
+                    compact_every=int(os.environ.get("HOSPITAL_LOG_COMPACT_EVERY", 1000))
+                )
+    return HANDOFF_LOG
+
 
 def log_entry(entry):
     """Append hospital response logs for session history"""
-    if not os.path.exists(LOG_FILE):
-        with open(LOG_FILE, "w") as f:
-            json.dump([], f)
-    with open(LOG_FILE, "r") as f:
-        logs = json.load(f)
-    logs.append(entry)
-    with open(LOG_FILE, "w") as f:
-        json.dump(logs, f, indent=4)
+    handoff_log().append(entry)
 
 def pick_ward(severity_score, injury_description=""):
     """Basic triage logic"""
-    if "burn" in injury_description.lower():
-        return "BURN WARD"
+    wards = KEYWORDS.labels(injury_description, "ward")
+    if wards:
+        return wards[0]
     if severity_score >= 8:
         return "ICU"
     if 5 <= severity_score < 8:
         return "HDU"
     return "TRAUMA WARD"
 
-@app.route("/handoff", methods=["POST"])
-def handoff():
-    data = request.json or {}
+def process_handoff(data):
+    """Builds the hospital's response to one AEGIS handoff (no I/O)."""
     timestamp = int(time.time())
-    
+
     injury_description = data.get("injury_description", "")
     severity_score = data.get("severity_score", 7)
-    
+
     # Use specialists sent by AEGIS
     specialists_from_aegis = data.get("specialists_required", [])
-    
+
     assigned_ward = pick_ward(severity_score, injury_description)
-    
+
     # Format specialists with mobilization status
     specialists_out = []
     for idx, spec in enumerate(specialists_from_aegis):
@@ -49,20 +277,104 @@ def handoff():
             "status": "MOBILIZED",
             "eta_minutes": 3 + idx
         })
-    
-    response = {
+
+    # Pipeline updates from AEGIS reuse the case opened by the pre-alert;
+    # new cases get a random suffix so concurrent handoffs never collide
+    case_id = data.get("case_id") or f"SIM_{timestamp}_{uuid.uuid4().hex[:12]}"
+
+    return {
         "status": "CONFIRMED",
         "timestamp": timestamp,
-        "case_id": f"SIM_{timestamp}",
+        "case_id": case_id,
+        "stage": data.get("stage", "handoff"),
         "assigned_ward": assigned_ward,
         "injury_description": injury_description,
         "specialists": specialists_out,
         "notes": "Hospital team mobilized per AEGIS recommendations."
     }
-    
+
+@app.route("/handoff", methods=["POST"])
+def handoff():
+    response = process_handoff(request.json or {})
     log_entry(response)
     return jsonify(response), 200
 
+
+def _exit_on_sigterm(signum, frame):
+    raise SystemExit(0)
+
+
+def _serve_worker(sock, durability):
+    """One --workers process: a threaded server accepting on the shared socket."""
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+    # Opened after the fork, so every worker has its own writer thread
+    log = handoff_log(durability)
+    host, port = sock.getsockname()[:2]
+    server = make_server(host, port, app, threaded=True, fd=sock.fileno())
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        server.server_close()
+        # multiprocessing exits workers without running atexit hooks
+        log.close()
+
+
+def serve(host="127.0.0.1", port=5001, workers=1, durability=None):
+    """
+    Runs the simulator. With workers > 1, that many forked processes
+    accept connections on one listening socket (the kernel spreads them)
+    and share the handoff log through its file lock.
+    """
+    if workers <= 1:
+        log = handoff_log(durability)
+        print(f"🏥 Hospital Simulation Server Running at http://{host}:{port}/handoff")
+        print(f"📒 Logging to {log.path} (durability: {log.durability})")
+        app.run(host=host, port=port, threaded=True)
+        return
+
+    if fcntl is None or "fork" not in multiprocessing.get_all_start_methods():
+        raise SystemExit("--workers needs fork() and fcntl; run a single worker on this platform")
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+
+    ctx = multiprocessing.get_context("fork")
+    procs = [
+        ctx.Process(target=_serve_worker, args=(sock, durability), name=f"hospital-{i}")
+        for i in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    print(f"🏥 Hospital Simulation Server Running at http://{host}:{port}/handoff ({workers} workers)")
+    print(f"📒 Logging to {LOG_FILE} (durability: {durability or os.environ.get('HOSPITAL_LOG_DURABILITY', 'batch')})")
+
+    try:
+        for proc in procs:
+            proc.join()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        for proc in procs:
+            if proc.is_alive():
+                proc.terminate()
+        for proc in procs:
+            proc.join(timeout=10)
+        sock.close()
+
+
 if __name__ == "__main__":
-    print("🏥 Hospital Simulation Server Running at http://127.0.0.1:5001/handoff")
-    app.run(port=5001)
+    parser = argparse.ArgumentParser(description="Hospital handoff simulator.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="server processes sharing the port and the handoff log")
+    parser.add_argument("--durability", choices=DURABILITY_MODES,
+                        default=os.environ.get("HOSPITAL_LOG_DURABILITY", "batch"))
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.workers, args.durability)
@@ -0,0 +1,178 @@
+# oracle/cached_oracle.py
+import copy
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from core.observability import Metrics
+
+# Vitals are rounded down to these steps before fingerprinting, so readings
+# that differ only by monitor noise share one oracle decision
+VITALS_BUCKETS = {"hr": 10, "bp_systolic": 10, "spo2": 2}
+
+
+def _bucket(value, step):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return int(value // step * step)
+
+
+def _trend_labels(trend):
+    if isinstance(trend, dict):
+        # Labels only; slopes and variances change with every reading
+        return sorted((k, v) for k, v in trend.items() if k.endswith("_trend"))
+    return str(trend)
+
+
+class CachedOracle:
+    """
+    Memoizing front for an oracle's `analyze()`.
+
+    Calls are keyed on a fingerprint of the normalized report, bucketed
+    vitals, severity, trend labels and the specialist set. Entries are
+    fresh for `ttl` seconds and evicted least recently used beyond
+    `max_entries`. Concurrent identical requests share one in-flight call
+    (single-flight). If that call takes longer than `timeout` or fails, an
+    expired entry no older than `stale_ttl` is served instead.
+
+    Hit/miss/shared/stale counters and call latencies go to `metrics`
+    under the `oracle.` prefix.
+    """
+
+    def __init__(self, oracle, metrics=None, ttl=300.0, max_entries=256, timeout=None,
+                 stale_ttl=3600.0, buckets=VITALS_BUCKETS, max_workers=4):
+        self.oracle = oracle
+        self.metrics = metrics or Metrics()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.stale_ttl = stale_ttl
+        self.buckets = dict(buckets)
+
+        self._entries = OrderedDict()  # key -> (stored_at, result)
+        self._inflight = {}  # key -> Future
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="oracle")
+
+    def fingerprint(self, report, vitals, severity_score, trend, specialists):
+        vitals = vitals or {}
+        doc = [
+            " ".join(re.findall(r"\w+", (report or "").lower())),
+            [(k, _bucket(vitals.get(k), step)) for k, step in sorted(self.buckets.items())],
+            severity_score,
+            _trend_labels(trend),
+            sorted(set(specialists or ()))
+        ]
+        raw = json.dumps(doc, separators=(",", ":"), default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key, now):
+        """(result, fresh) for `key`, or (None, False) if not cached."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, False
+        stored_at, result = entry
+        age = now - stored_at
+        if age > self.stale_ttl:
+            del self._entries[key]
+            return None, False
+        self._entries.move_to_end(key)
+        return result, age <= self.ttl
+
+    def _store(self, key, result):
+        """Caches `result` and retires its in-flight call under one lock hold."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            self._inflight.pop(key, None)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.metrics.count("oracle.cache.evict")
+
+    def _call(self, key, args):
+        start = time.perf_counter()
+        try:
+            result = self.oracle.analyze(*args)
+        except BaseException:
+            with self._lock:
+                self._inflight.pop(key, None)
+            raise
+        finally:
+            self.metrics.observe("oracle.call", time.perf_counter() - start)
+        # Popping before storing would let a caller in between start a second call
+        self._store(key, result)
+        return result
+
+    @staticmethod
+    def _own_copy(result, severity_score, trend, specialists):
+        """
+        A private copy of a (possibly shared) result carrying this caller's
+        own inputs: the key only covers trend labels and buckets, so the
+        cached trend numbers may belong to another call, or patient.
+        """
+        result = copy.deepcopy(result)
+        result["severity_score"] = severity_score
+        result["trend"] = copy.deepcopy(trend)
+        result["specialists_required"] = copy.deepcopy(specialists)
+        return result
+
+    def analyze(self, report, vitals, severity_score, trend, specialists):
+        args = (report, vitals, severity_score, trend, specialists)
+        key = self.fingerprint(*args)
+        start = time.perf_counter()
+
+        with self._lock:
+            cached, fresh = self._lookup(key, time.monotonic())
+            if fresh:
+                self.metrics.count("oracle.cache.hit")
+                self.metrics.observe("oracle.analyze", time.perf_counter() - start)
+                return self._own_copy(cached, severity_score, trend, specialists)
+
+            future = self._inflight.get(key)
+            if future is None:
+                self.metrics.count("oracle.cache.miss")
+                future = self._pool.submit(self._call, key, args)
+                self._inflight[key] = future
+            else:
+                self.metrics.count("oracle.cache.shared")
+
+        try:
+            result = future.result(timeout=self.timeout if cached is not None else None)
+        except FutureTimeout:
+            # The call keeps running and refreshes the entry when it lands
+            self.metrics.count("oracle.cache.stale")
+            result = cached
+        except Exception:
+            if cached is None:
+                raise
+            self.metrics.count("oracle.cache.stale")
+            result = cached
+
+        self.metrics.observe("oracle.analyze", time.perf_counter() - start)
+        # Callers annotate the result in place; never hand out the cached dict
+        return self._own_copy(result, severity_score, trend, specialists)
+
+    def stats(self):
+        counters = self.metrics.export()["counters"]
+        hits = counters.get("oracle.cache.hit", 0)
+        misses = counters.get("oracle.cache.miss", 0)
+        with self._lock:
+            size, inflight = len(self._entries), len(self._inflight)
+        return {
+            "entries": size,
+            "inflight": inflight,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            **{k: v for k, v in counters.items() if k.startswith("oracle.")}
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def close(self):
+        self._pool.shutdown(wait=False)
@@ -1,4 +1,9 @@
 # oracle/gemini_oracle_stub.py
+import random
+import threading
+import time
+
+
 class GeminiOracle:
     """
     Stub: In real deployment this calls Gemini model.
@@ -14,3 +19,27 @@ class GeminiOracle:
             "specialists_required": specialists,
             "notes": "LLM Oracle Stub Response"
         }
+
+
+class LocalOracle(GeminiOracle):
+    """
+    Local stand-in for the remote model with configurable latency, for
+    exercising caches and timeouts without network access.
+
+    Each call sleeps `latency` seconds plus up to `jitter` more; `calls`
+    counts how many requests actually reached the "model".
+    """
+
+    def __init__(self, latency=0.5, jitter=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def analyze(self, report, vitals, severity_score, trend, specialists):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+        time.sleep(delay)
+        return super().analyze(report, vitals, severity_score, trend, specialists)
@@ -0,0 +1,112 @@
+# tools/headless.py
+import collections
+import threading
+import time
+from concurrent.futures import Future
+
+from core.observability import Metrics
+from hospital_sim import process_handoff
+
+
+class ScriptedASR:
+    """
+    Stands in for ASRAgent: `listen()` returns queued transcripts in order
+    instead of recording the microphone, and "" (no response) once the
+    script runs out. `latency` adds a fixed delay per utterance to model
+    the medic speaking.
+    """
+
+    def __init__(self, transcripts=(), latency=0.0):
+        self.latency = latency
+        self.heard = 0
+        self._script = collections.deque(transcripts)
+        self._lock = threading.Lock()
+
+    def script(self, transcripts):
+        """Queues more transcripts after whatever is still pending."""
+        with self._lock:
+            self._script.extend(transcripts)
+
+    def pending(self):
+        with self._lock:
+            return len(self._script)
+
+    def listen(self, timeout=None, phrase_time_limit=None):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.heard += 1
+            return self._script.popleft() if self._script else ""
+
+    def on_speech(self, callback):
+        # No audio, so no barge-in
+        pass
+
+    def stop(self):
+        pass
+
+
+class SilentTTS:
+    """
+    Stands in for TTSAgent: every prompt "plays" instantly and nothing is
+    rendered. Prompts are counted; with `record=True` their text is kept
+    in `spoken` as well.
+    """
+
+    def __init__(self, record=False):
+        self.record = record
+        self.spoken = []
+        self.count = 0
+
+    def say(self, text, priority=None, coalesce_key=None):
+        self.count += 1
+        if self.record:
+            self.spoken.append(text)
+        future = Future()
+        future.set_result(True)
+        return future
+
+    def speak(self, text, priority=None):
+        return self.say(text, priority=priority).result()
+
+    def warm(self, phrases, background=True):
+        return None
+
+    def interrupt(self):
+        pass
+
+    def wait_idle(self, timeout=None):
+        return True
+
+    def close(self):
+        pass
+
+
+class InProcessHospital:
+    """
+    Stands in for HospitalOpenAPIClient: handoffs go straight to
+    hospital_sim.process_handoff, with no HTTP round trip. `latency`
+    models the network and hospital side; `log` (a hospital_sim
+    HandoffLog) also persists every response as the server would.
+    Timings land in the same `hospital.handoff` histogram.
+    """
+
+    def __init__(self, latency=0.0, log=None, metrics=None):
+        self.latency = latency
+        self.log = log
+        self.metrics = metrics or Metrics()
+
+    def handoff(self, payload):
+        with self.metrics.timer("hospital.handoff"):
+            if self.latency:
+                time.sleep(self.latency)
+            response = process_handoff(payload)
+            if self.log is not None:
+                self.log.append(response)
+        return response
+
+    def latency_stats(self):
+        return self.metrics.histogram("hospital.handoff")
+
+    def close(self):
+        pass
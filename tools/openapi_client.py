@@ -1,17 +1,92 @@
 # tools/openapi_client.py
+import random
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from core.observability import Metrics
+
 
 class HospitalOpenAPIClient:
     """
     Sends patient data & requests resources from hospital AI.
+
+    Owns a pooled keep-alive session, so bursts of handoffs reuse TCP
+    connections. POST /handoff opens a new case each time, so only
+    failures where the hospital cannot have seen the request (connection
+    refused, connect timeout, 502/503 from a proxy) are retried, with
+    jittered exponential backoff. A connection dropped after sending, a
+    read timeout or a 504 may mean the handoff was accepted, and is
+    reported as an error instead.
+
+    Call latencies (including retries) go to the `hospital.handoff`
+    histogram of `metrics`, with retry and error counters alongside.
     """
 
-    def __init__(self, base_url):
+    RETRY_STATUSES = {502, 503}
+
+    def __init__(self, base_url, pool_size=10, max_retries=2, backoff=0.1,
+                 backoff_max=2.0, connect_timeout=2.0, read_timeout=5.0, metrics=None):
         self.base_url = base_url
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.timeout = (connect_timeout, read_timeout)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.metrics = metrics or Metrics()
+
+    @staticmethod
+    def _never_sent(error):
+        """True if the connection failed before the request went out."""
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+    def _sleep_before_retry(self, attempt):
+        # "Full jitter": uniform over [0, capped exponential backoff]
+        cap = min(self.backoff_max, self.backoff * (2 ** attempt))
+        time.sleep(random.uniform(0, cap))
 
     def handoff(self, payload):
+        token = self.metrics.start("hospital.handoff")
+        attempt = 0
         try:
-            r = requests.post(self.base_url + "/handoff", json=payload, timeout=5)
-            return r.json()
+            while True:
+                attempt += 1
+                try:
+                    r = self.session.post(self.base_url + "/handoff", json=payload, timeout=self.timeout)
+                except requests.exceptions.ConnectionError as e:
+                    # ConnectTimeout is a ConnectionError too; ReadTimeout is not.
+                    if attempt > self.max_retries or not self._never_sent(e):
+                        raise
+                    self._sleep_before_retry(attempt - 1)
+                    continue
+
+                if r.status_code in self.RETRY_STATUSES and attempt <= self.max_retries:
+                    self._sleep_before_retry(attempt - 1)
+                    continue
+                return r.json()
         except Exception as e:
+            self.metrics.count("hospital.handoff.errors")
             return {"error": str(e)}
+        finally:
+            self.metrics.stop(token)
+            if attempt > 1:
+                self.metrics.count("hospital.handoff.retries", attempt - 1)
+
+    def latency_stats(self):
+        """Per-call latency summary (seconds): count, mean, percentiles, max."""
+        stats = self.metrics.histogram("hospital.handoff")
+        stats["retries"] = self.metrics.export()["counters"].get("hospital.handoff.retries", 0)
+        return stats
+
+    def close(self):
+        self.session.close()
@@ -1,58 +1,439 @@
 # web/dashboard.py
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request, stream_with_context
 import json
+import os
+import sys
+import threading
+import time
+from itertools import islice
 from pathlib import Path
 
 app = Flask(__name__, template_folder="templates", static_folder="static")
 BASE = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE))
 
-A2A_LOG = BASE / "a2a_logs.json"
+from aegis_replay import ReplayEngine, load_recordings
+from core.a2a import iter_a2a_log
+from core.observability import METRICS_PATH
+from core.sessions import iter_memory_bank
+
+A2A_LOG = BASE / "a2a_logs.jsonl"
 MEMORY_BANK = BASE / "memory_bank.json"
 LAST_ANALYSIS = BASE / "last_analysis.json"
+METRICS = Path(METRICS_PATH)
+VITALS = BASE / "vitals.json"
 
+DEFAULT_LIMIT = 200
+MAX_LIMIT = 5000
+SSE_POLL_S = 0.5
+SSE_HEARTBEAT_S = 15.0
+MAX_REPLAYS = 5000
+REPLAY_WORKERS = min(4, os.cpu_count() or 1)
 
-def _load_json(path: Path):
-    try:
-        if path.exists():
-            return json.loads(path.read_text())
-        return []
-    except:
-        return []
+# VitalsBuffer / Metrics of the AEGIS instance hosting this dashboard in-process
+_vitals_buffer = None
+_metrics = None
+
+
+def attach_vitals(buffer):
+    """Serve a live VitalsBuffer from /api/vitals."""
+    global _vitals_buffer
+    _vitals_buffer = buffer
+
+
+def attach_metrics(metrics):
+    """Serve live Metrics snapshots from /api/metrics."""
+    global _metrics
+    _metrics = metrics
+
+
+class _LogTail:
+    """
+    In-process cache over an append-only log.
+
+    `refresh()` stats the files and, when they grew, parses only the new
+    entries. The newest `keep` entries stay in memory; older cursors are
+    served from disk. Entries are addressed by their 0-based offset in the
+    log, which is the cursor used by `?since=` and SSE event ids.
+    `generation` changes whenever the log is replaced rather than appended.
+    """
+
+    def __init__(self, name, keep=MAX_LIMIT):
+        self.name = name
+        self.keep = keep
+        self.entries = []
+        self.base = 0  # offset of entries[0]
+        self.generation = 0
+        self._signature = None
+        self._lock = threading.Lock()
+
+    @property
+    def total(self):
+        return self.base + len(self.entries)
+
+    def _reset(self):
+        self.entries = []
+        self.base = 0
+        self.generation += 1
+
+    def _append(self, entry):
+        self.entries.append(entry)
+        if len(self.entries) > self.keep + self.keep // 2:
+            drop = len(self.entries) - self.keep
+            del self.entries[:drop]
+            self.base += drop
+
+    def _stat(self):
+        raise NotImplementedError
+
+    def _read_new(self, signature):
+        raise NotImplementedError
+
+    def _read_range(self, since, limit):
+        raise NotImplementedError
+
+    def refresh(self):
+        signature = self._stat()
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature != self._signature:
+                try:
+                    self._read_new(signature)
+                except (OSError, ValueError):
+                    # Unreadable entry, or the file was replaced under us:
+                    # start over on the next request
+                    self._reset()
+                    signature = None
+                self._signature = signature
+
+    def etag(self, *params):
+        return f"{self.name}-{self.generation}-{self.total}-" + "-".join(str(p) for p in params)
+
+    def page(self, since, limit):
+        """Entries [since, since + limit) in log order, plus the next cursor."""
+        with self._lock:
+            since = max(0, min(since, self.total))
+            if since >= self.base:
+                start = since - self.base
+                entries = self.entries[start:start + limit]
+            else:
+                entries = None
+        if entries is None:
+            entries = self._read_range(since, limit)
+        return entries, since + len(entries)
+
+    def latest(self, limit):
+        """The newest `limit` entries, newest first."""
+        with self._lock:
+            if limit <= len(self.entries) or self.base == 0:
+                return self.entries[:-limit - 1:-1] if limit else []
+            since = max(0, self.total - limit)
+        return self._read_range(since, limit)[::-1]
+
+
+class _JsonlTail(_LogTail):
+    """Tails a JSON-lines file by byte offset; truncation or rotation reloads it."""
+
+    def __init__(self, name, path, keep=MAX_LIMIT):
+        super().__init__(name, keep)
+        self.path = str(path)
+        self._pos = 0
+
+    def _reset(self):
+        super()._reset()
+        self._pos = 0
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _read_new(self, signature):
+        old = self._signature
+        if signature is None or old is None or signature[:2] != old[:2] or signature[2] < self._pos:
+            self._reset()
+        if signature is None:
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(self._pos)
+            data = f.read(signature[2] - self._pos)
+        # Leave a torn last line for the next refresh
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            if line.strip():
+                self._append(json.loads(line))
+        self._pos += len(complete)
+
+    def _read_range(self, since, limit):
+        try:
+            return list(islice(iter_a2a_log(self.path), since, since + limit))
+        except (OSError, ValueError):
+            return []
+
+
+class _MemoryBankTail(_LogTail):
+    """Tails a segmented MemoryBank store by sequence number."""
+
+    def __init__(self, name, path, keep=MAX_LIMIT):
+        super().__init__(name, keep)
+        self.path = str(path)
+        self.seg_dir = os.path.splitext(self.path)[0] + ".d"
+        self._segments = 0
+
+    def _stat(self):
+        try:
+            names = sorted(n for n in os.listdir(self.seg_dir) if n.endswith(".jsonl"))
+            if not names:
+                return None
+            st = os.stat(os.path.join(self.seg_dir, names[-1]))
+        except OSError:
+            return None
+        return (len(names), names[-1], st.st_size, st.st_mtime_ns)
+
+    def _read_new(self, signature):
+        if signature is None or signature[0] < self._segments:
+            self._reset()
+        self._segments = signature[0] if signature else 0
+        if signature is None:
+            return
+        for entry in iter_memory_bank(self.path, since=self.total):
+            self._append(entry)
+
+    def _read_range(self, since, limit):
+        try:
+            return list(islice(iter_memory_bank(self.path, since=since), limit))
+        except (OSError, ValueError):
+            return []
+
+
+class _JsonFileCache:
+    """A small JSON document, re-parsed only when its mtime or size changes."""
+
+    def __init__(self, path, default=None):
+        self.path = str(path)
+        self.default = default
+        self.value = default
+        self.signature = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        try:
+            st = os.stat(self.path)
+            signature = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return self.default, None
+        if signature != self.signature:
+            with self._lock:
+                if signature != self.signature:
+                    try:
+                        with open(self.path, "r") as f:
+                            self.value = json.load(f)
+                    except (OSError, ValueError):
+                        # Caught mid-write; serve the previous value
+                        return self.value, self.signature
+                    self.signature = signature
+        return self.value, self.signature
+
+
+_tails = {
+    "a2a": _JsonlTail("a2a", A2A_LOG),
+    "memory": _MemoryBankTail("memory", MEMORY_BANK),
+}
+_last_analysis = _JsonFileCache(LAST_ANALYSIS)
+_metrics_file = _JsonFileCache(METRICS, default={})
+_vitals_file = _JsonFileCache(VITALS, default={})
+
+
+def _int_arg(name, default, lo=0, hi=None):
+    value = request.args.get(name, default=default, type=int)
+    value = default if value is None else max(lo, value)
+    return min(value, hi) if hi is not None else value
+
+
+def _not_modified(etag):
+    return etag is not None and request.if_none_match.contains(etag)
+
+
+def _conditional_json(payload, etag):
+    response = jsonify(payload)
+    if etag is not None:
+        response.set_etag(etag)
+    return response
+
+
+def _tail_response(tail):
+    """
+    Without `since`: the newest `limit` entries, newest first (as before,
+    but bounded). With `since`: entries from that cursor in log order,
+    wrapped with `next` (the cursor for the following request) and `total`.
+    """
+    tail.refresh()
+    limit = _int_arg("limit", DEFAULT_LIMIT, 0, MAX_LIMIT)
+    since = request.args.get("since", type=int)
+
+    etag = tail.etag(since, limit)
+    if _not_modified(etag):
+        return Response(status=304, headers={"ETag": f'"{etag}"'})
+
+    if since is None:
+        return _conditional_json(tail.latest(limit), etag)
+    entries, next_cursor = tail.page(since, limit)
+    return _conditional_json({
+        "since": since,
+        "next": next_cursor,
+        "total": tail.total,
+        "entries": entries
+    }, etag)
+
+
+def _file_response(cache, empty=None):
+    value, signature = cache.get()
+    value = empty if value is None else value
+    etag = f"{os.path.basename(cache.path)}-{signature[0]}-{signature[1]}" if signature else None
+    if _not_modified(etag):
+        return Response(status=304, headers={"ETag": f'"{etag}"'})
+    return _conditional_json(value, etag)
 
 
 @app.route("/")
 def index():
-    a2a = _load_json(A2A_LOG)
-    memory = _load_json(MEMORY_BANK)
-    last = _load_json(LAST_ANALYSIS) if LAST_ANALYSIS.exists() else None
+    for tail in _tails.values():
+        tail.refresh()
+    last, _ = _last_analysis.get()
     return render_template(
         "index.html",
-        a2a_logs=a2a[::-1],
-        memory=memory[::-1],
+        a2a_logs=_tails["a2a"].latest(DEFAULT_LIMIT),
+        memory=_tails["memory"].latest(10),
         last_analysis=last
     )
 
 
 @app.route("/api/a2a")
 def api_a2a():
-    return jsonify(_load_json(A2A_LOG)[::-1])
+    return _tail_response(_tails["a2a"])
 
 
 @app.route("/api/last")
 def api_last():
-    return jsonify(_load_json(LAST_ANALYSIS))
+    return _file_response(_last_analysis, empty=[])
 
 
 @app.route("/api/memory")
 def api_memory():
-    return jsonify(_load_json(MEMORY_BANK)[::-1])
+    return _tail_response(_tails["memory"])
+
+
+@app.route("/api/stream")
+def api_stream():
+    """
+    Server-sent events with entries appended to the A2A log and memory
+    bank (`?source=a2a,memory`). Each event's id carries the next cursor
+    of every streamed source (`a2a=124;memory=57`), so a client
+    reconnecting with Last-Event-ID resumes all of them without gaps.
+    New clients start at the end unless `since` is given.
+    """
+    sources = [s for s in request.args.get("source", "a2a,memory").split(",") if s in _tails]
+    since = request.args.get("since", type=int)
+
+    cursors = {}
+    for name in sources:
+        tail = _tails[name]
+        tail.refresh()
+        cursors[name] = tail.total if since is None else since
+
+    for part in request.headers.get("Last-Event-ID", "").split(";"):
+        name, _, cursor = part.partition("=")
+        if name in cursors and cursor.isdigit():
+            cursors[name] = int(cursor)
+
+    def event_id():
+        return ";".join(f"{name}={cursors[name]}" for name in sources)
+
+    def events():
+        last_sent = time.monotonic()
+        yield "retry: 2000\n\n"
+        while True:
+            sent = False
+            for name in sources:
+                tail = _tails[name]
+                tail.refresh()
+                if cursors[name] > tail.total:
+                    # Log was replaced; follow the new one from its start
+                    cursors[name] = 0
+                while cursors[name] < tail.total:
+                    entries, _ = tail.page(cursors[name], 100)
+                    if not entries:
+                        break
+                    for entry in entries:
+                        cursors[name] += 1
+                        yield f"id: {event_id()}\nevent: {name}\ndata: {json.dumps(entry, default=str)}\n\n"
+                    sent = True
+            now = time.monotonic()
+            if sent:
+                last_sent = now
+            elif now - last_sent >= SSE_HEARTBEAT_S:
+                yield ": keep-alive\n\n"
+                last_sent = now
+            time.sleep(SSE_POLL_S)
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.route("/api/vitals")
+def api_vitals():
+    # In-process buffer if attached, otherwise the last vitals.json AEGIS exported
+    n = _int_arg("n", 300, 1)
+    if _vitals_buffer is not None:
+        return jsonify(_vitals_buffer.to_dict(n))
+    columns, _ = _vitals_file.get()
+    return jsonify({name: values[-n:] for name, values in (columns or {}).items()})
+
+
+@app.route("/api/metrics")
+def api_metrics():
+    # In-process Metrics if attached, otherwise the exporter's last snapshot
+    if _metrics is not None:
+        return jsonify(_metrics.export())
+    return _file_response(_metrics_file)
 
 
 @app.route("/api/replay", methods=["POST"])
 def api_replay():
-    data = request.get_json() or {}
-    return jsonify({"status": "ok", "replayed": data})
+    """
+    Replays recorded sessions from the memory bank through the current
+    agents and returns each changed decision next to the original.
+
+    JSON body (all optional): `since` (memory bank offset), `limit`
+    (sessions, default 100), `ids` (case ids), `workers` and `all`
+    (include unchanged sessions). Replays run as fast as possible: a
+    paced `speed` would hold the request for as long as the recordings
+    last, so it is only accepted as null (use aegis_replay.py --speed).
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        since = max(0, int(data.get("since", 0)))
+        limit = min(MAX_REPLAYS, max(1, int(data.get("limit", 100))))
+        workers = min(os.cpu_count() or 1, max(1, int(data.get("workers", REPLAY_WORKERS))))
+        if data.get("speed") is not None:
+            raise ValueError("paced replays are not served over HTTP; omit speed or use aegis_replay.py --speed")
+        ids = data.get("ids")
+        if ids is not None and not isinstance(ids, list):
+            raise ValueError("ids must be a list")
+    except (TypeError, ValueError) as e:
+        return jsonify({"status": "error", "error": str(e)}), 400
+
+    recordings = load_recordings(str(MEMORY_BANK), str(A2A_LOG), since=since, limit=limit, ids=ids)
+    engine = ReplayEngine(workers=workers, include_unchanged=bool(data.get("all")))
+    return jsonify({"status": "ok", **engine.run(recordings)})
 
 
 if __name__ == "__main__":
-    app.run(port=8080, debug=True)
+    app.run(port=8080, debug=True, threaded=True)